@@ -0,0 +1,104 @@
+import time
+
+from sqlalchemy import text
+
+# ------------------ Booking Analytics Rollup ------------------
+#
+# booking_daily holds one row per (package, UTC day) with the number of bookings
+# and their revenue at the price paid, which save_booking copies onto the
+# booking. Triggers on booking keep it current, so save_booking updates it within
+# its own INSERT; the admin charts read only this table. rebuild_booking_daily()
+# recomputes everything from booking, including bookings of deleted packages.
+#
+# While a rebuild runs, booking_daily_rebuild holds how far it got: a booking
+# deleted in the range it has not reached yet is simply not counted later, so
+# the delete trigger leaves booking_daily alone for it.
+
+ROLLUP_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS booking_daily_insert AFTER INSERT ON booking BEGIN"
+    " INSERT INTO booking_daily (package_id, day, bookings, revenue)"
+    " VALUES (new.package_id, date(COALESCE(new.created_at, 'now')), 1, COALESCE(new.price, 0))"
+    " ON CONFLICT (package_id, day) DO UPDATE SET"
+    " bookings = bookings + 1, revenue = revenue + excluded.revenue;"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS booking_daily_delete AFTER DELETE ON booking"
+    " WHEN NOT EXISTS (SELECT 1 FROM booking_daily_rebuild"
+    " WHERE old.id > done_up_to AND old.id <= last_id) BEGIN"
+    " UPDATE booking_daily SET bookings = bookings - 1, revenue = revenue - COALESCE(old.price, 0)"
+    " WHERE package_id = old.package_id AND day = date(COALESCE(old.created_at, 'now'));"
+    " END",
+]
+
+_UPSERT_RANGE = text(
+    "INSERT INTO booking_daily (package_id, day, bookings, revenue)"
+    " SELECT package_id, date(COALESCE(created_at, 'now')) AS day,"
+    " count(*), COALESCE(SUM(price), 0)"
+    " FROM booking WHERE id > :lo AND id <= :hi"
+    " GROUP BY package_id, day"
+    " ON CONFLICT (package_id, day) DO UPDATE SET"
+    " bookings = bookings + excluded.bookings, revenue = revenue + excluded.revenue"
+)
+
+
+def backfill_booking_daily(conn, batch_size=5000):
+    # Migration step: aggregate existing bookings in id ranges, one transaction
+    last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM booking")).scalar()
+    for lo in range(0, last_id, batch_size):
+        conn.execute(_UPSERT_RANGE, {'lo': lo, 'hi': lo + batch_size})
+
+
+def rebuild_booking_daily(engine, batch_size=5000, pause=0.0):
+    # Recompute the rollup with one short transaction per batch and a pause in
+    # between, so bookings keep going through. Bookings made during the rebuild
+    # have ids above the starting maximum and are counted by the trigger.
+    with engine.begin() as conn:
+        last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM booking")).scalar()
+        conn.execute(text("DELETE FROM booking_daily"))
+        conn.execute(text("DELETE FROM booking_daily_rebuild"))
+        conn.execute(text("INSERT INTO booking_daily_rebuild (done_up_to, last_id) VALUES (0, :last)"),
+                     {'last': last_id})
+    batches = 0
+    try:
+        for lo in range(0, last_id, batch_size):
+            hi = min(lo + batch_size, last_id)
+            with engine.begin() as conn:
+                conn.execute(_UPSERT_RANGE, {'lo': lo, 'hi': hi})
+                conn.execute(text("UPDATE booking_daily_rebuild SET done_up_to = :hi"), {'hi': hi})
+            batches += 1
+            if pause:
+                time.sleep(pause)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM booking_daily_rebuild"))
+    return {'bookings_up_to_id': last_id, 'batches': batches}
+
+
+def daily_totals(conn, start, end, package_id=None):
+    # [(day, bookings, revenue)] for the days in [start, end] that had bookings
+    where = "day BETWEEN :start AND :end"
+    if package_id is not None:
+        where += " AND package_id = :pid"
+    rows = conn.execute(
+        text(f"SELECT day, SUM(bookings), SUM(revenue) FROM booking_daily WHERE {where} GROUP BY day ORDER BY day"),
+        {'start': start.isoformat(), 'end': end.isoformat(), 'pid': package_id},
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def package_totals(conn, start, end, limit=20):
+    # Packages ranked by revenue in [start, end]; title is None for deleted ones
+    rows = conn.execute(
+        text(
+            "SELECT booking_daily.package_id, package.title,"
+            " SUM(booking_daily.bookings) AS bookings, SUM(booking_daily.revenue) AS revenue"
+            " FROM booking_daily LEFT JOIN package ON package.id = booking_daily.package_id"
+            " WHERE booking_daily.day BETWEEN :start AND :end"
+            " GROUP BY booking_daily.package_id"
+            " ORDER BY revenue DESC, bookings DESC LIMIT :limit"
+        ),
+        {'start': start.isoformat(), 'end': end.isoformat(), 'limit': limit},
+    ).all()
+    return [
+        {'package_id': r.package_id, 'title': r.title, 'bookings': r.bookings, 'revenue': r.revenue}
+        for r in rows
+    ]
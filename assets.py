@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import current_app, request, send_from_directory
+
+# ------------------ Static Asset Pipeline ------------------
+#
+# `flask build-assets` (or startup, with ASSETS_AUTO_BUILD) minifies every file
+# in static/css and static/js plus the BUNDLES below, names each copy after a
+# hash of its content and writes it with .gz (and .br when the brotli package is
+# installed) variants to static/dist, together with manifest.json. Once a
+# manifest is loaded, url_for('static', filename='css/base.css') builds the
+# hashed URL, and files under dist/ are served precompressed with a far-future
+# immutable Cache-Control: a changed file gets a new name instead of a
+# revalidation. Without a build, bundles are concatenated on the fly.
+
+log = logging.getLogger(__name__)
+
+SOURCE_DIRS = ('css', 'js')
+# Bundle -> source files, all relative to static/. One stylesheet per page:
+# base.css followed by the page's own rules.
+BUNDLES = {
+    'bundles/index.css': ['css/base.css', 'css/index.css'],
+    'bundles/budget.css': ['css/base.css', 'css/budget.css'],
+    'bundles/profile.css': ['css/base.css', 'css/profile.css'],
+}
+OUTPUT_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+_manifest = {}
+# (hash of the loaded manifest, its mtime): part of the ETag of cached pages
+# that link to hashed assets, so a deploy never revalidates stale HTML
+_build = ('', 0.0)
+
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)(?![\'"]?(?:data:|[a-z]+://|/|#))([^\'")]+)\1\s*\)')
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    parts = _CSS_STRING.split(text)
+    for i in range(0, len(parts), 2):  # odd indexes are quoted strings
+        part = re.sub(r'\s+', ' ', parts[i])
+        # No space around punctuation that cannot need it; a space before ':'
+        # is kept since "a :hover" and "a:hover" differ
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        parts[i] = re.sub(r':\s+', ':', part)
+    return ''.join(parts).replace(';}', '}').strip() + '\n'
+
+
+def absolute_css_urls(text, source, static_url_path):
+    # Relative url()s point next to the source file, which moves into dist/
+    base = posixpath.dirname(source)
+    return _CSS_URL.sub(
+        lambda m: f"url({m.group(1)}{static_url_path}/{posixpath.normpath(posixpath.join(base, m.group(2)))}{m.group(1)})",
+        text,
+    )
+
+
+def minify_js(text):
+    # Conservative: drop blank lines, whole-line // comments and indentation,
+    # keeping line breaks so automatic semicolon insertion is unaffected
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _minify(name, text, static_url_path):
+    if name.endswith('.css'):
+        return minify_css(absolute_css_urls(text, name, static_url_path))
+    return minify_js(text)
+
+
+def _sources(static_folder):
+    # Logical name -> source paths; every css/js file is its own "bundle"
+    sources = {}
+    for directory in SOURCE_DIRS:
+        folder = os.path.join(static_folder, directory)
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                if filename.endswith(('.css', '.js')):
+                    sources[f"{directory}/{filename}"] = [f"{directory}/{filename}"]
+    sources.update(BUNDLES)
+    return sources
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _brotli():
+    try:
+        import brotli  # optional: only .gz variants are written without it
+    except ImportError:
+        return None
+    return brotli
+
+
+def build(static_folder, static_url_path='/static'):
+    # Returns the manifest {logical name: hashed name}, also written to dist/
+    output = os.path.join(static_folder, OUTPUT_DIR)
+    brotli = _brotli()
+    manifest = {}
+    for name, files in _sources(static_folder).items():
+        parts = []
+        for source in files:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                parts.append(_minify(source, f.read(), static_url_path))
+        data = ''.join(parts).encode('utf-8')
+        stem, ext = os.path.splitext(name)
+        hashed = f"{OUTPUT_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        path = os.path.join(static_folder, hashed)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write(path + '.gz', gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                _write(path + '.br', brotli.compress(data, quality=11))
+            _write(path, data)
+        manifest[name] = hashed
+    os.makedirs(output, exist_ok=True)
+    _write(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _stale(static_folder):
+    try:
+        built = os.path.getmtime(os.path.join(static_folder, OUTPUT_DIR, MANIFEST))
+        return any(
+            os.path.getmtime(os.path.join(static_folder, source)) > built
+            for files in _sources(static_folder).values() for source in files
+        )
+    except OSError:
+        return True
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, OUTPUT_DIR, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_version():
+    return _build
+
+
+def init_app(app):
+    global _manifest, _build
+    _manifest = {}
+    _build = ('', 0.0)
+    if app.config['ASSETS_ENABLED']:
+        if app.config['ASSETS_AUTO_BUILD'] and _stale(app.static_folder):
+            try:
+                build(app.static_folder, app.static_url_path)
+            except OSError as e:
+                log.warning('Could not build static assets: %s', e)
+        _manifest = load_manifest(app.static_folder)
+        if _manifest:
+            digest = hashlib.sha256(json.dumps(_manifest, sort_keys=True).encode('utf-8')).hexdigest()[:10]
+            _build = (digest, os.path.getmtime(os.path.join(app.static_folder, OUTPUT_DIR, MANIFEST)))
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static':
+            hashed = _manifest.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = hashed
+
+    @app.before_request
+    def serve_asset():
+        if request.endpoint != 'static':
+            return None
+        filename = (request.view_args or {}).get('filename', '')
+        if filename.startswith(OUTPUT_DIR + '/'):
+            return _send_built(filename)
+        if filename in BUNDLES:
+            return _send_unbuilt_bundle(filename)
+        return None
+
+
+def _send_built(filename):
+    # Content-hashed: cache for good, and pick a precompressed variant
+    static_folder = current_app.static_folder
+    accepted = request.accept_encodings
+    response = None
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            response = send_from_directory(static_folder, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(static_folder, filename)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.no_cache = None  # set by send_file without SEND_FILE_MAX_AGE_DEFAULT
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['ASSETS_MAX_AGE']
+    response.cache_control.immutable = True
+    return response
+
+
+def _send_unbuilt_bundle(filename):
+    static_folder = current_app.static_folder
+    parts = []
+    for source in BUNDLES[filename]:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+            parts.append(f.read())
+    return current_app.response_class(''.join(parts), mimetype=mimetypes.guess_type(filename)[0])
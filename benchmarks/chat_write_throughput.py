@@ -0,0 +1,85 @@
+"""Chat write-path throughput: per-message commits vs. batched group commits.
+
+Sends messages through services.save_dm_message() from several sender threads,
+once with CHAT_WRITE_MODE='sync' and once with 'batched', against a throwaway
+SQLite file. The batched timing includes the final flush, i.e. it measures
+messages per second until everything is on disk.
+
+    python benchmarks/chat_write_throughput.py --senders 8 --messages 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import CONFIGS  # noqa: E402
+from extensions import db  # noqa: E402
+import services  # noqa: E402
+
+
+def run_mode(mode, profile, senders, messages):
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = {key: getattr(CONFIGS[profile], key) for key in dir(CONFIGS[profile]) if key.isupper()}
+        settings.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            CHAT_WRITE_MODE=mode,
+        )
+        app = create_app(settings)
+        with app.app_context():
+            db.create_all()
+
+        def send(worker):
+            with app.app_context():
+                for i in range(messages):
+                    services.save_dm_message(worker + 1, worker + 2, f"message {i}")
+
+        threads = [threading.Thread(target=send, args=(w,)) for w in range(senders)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        acked = time.perf_counter() - start
+        if services.message_writer is not None:
+            services.message_writer.flush()
+        durable = time.perf_counter() - start
+
+        with app.app_context():
+            written = db.session.query(db.func.count()).select_from(db.metadata.tables['message']).scalar()
+            db.engine.dispose()
+        if services.message_writer is not None:
+            services.message_writer.stop()
+
+    return {
+        'mode': mode,
+        'profile': profile,
+        'messages': senders * messages,
+        'written': written,
+        'ack_seconds': round(acked, 3),
+        'durable_seconds': round(durable, 3),
+        'messages_per_second': round(written / durable, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--senders', type=int, default=8)
+    parser.add_argument('--messages', type=int, default=250, help='messages per sender')
+    parser.add_argument('--profile', default='production', help='config profile (SQLite pragmas)')
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args.profile, args.senders, args.messages) for mode in ('sync', 'batched')]
+    print(json.dumps(results, indent=2))
+    if results[0]['messages_per_second']:
+        print(f"speedup: {results[1]['messages_per_second'] / results[0]['messages_per_second']:.1f}x",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Latency and throughput of the Tripmate hot paths against a synthetic database.
+
+Seeds a throwaway SQLite file at the requested scale (users, friendships,
+messages, packages, budgets, bookings) through the app's own data helpers, logs
+in as the busiest user and drives each hot endpoint plus the Socket.IO
+send_message handler with the Flask / Socket.IO test clients. Prints one JSON
+document (scale, settings and per-scenario p50/p90/p99) so runs before and after
+a change can be diffed; --output also writes it to a file.
+
+    python benchmarks/hot_paths.py --users 2000 --messages 50000 --requests 300
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import CONFIGS  # noqa: E402
+from extensions import db, socketio  # noqa: E402
+from models import User, Friend, Budget, Booking, Package  # noqa: E402
+import services  # noqa: E402
+
+PASSWORD = 'secret1'
+PLACES = ['Baga Beach', 'Fort Aguada', 'Munnar', 'Alleppey', 'Hampi', 'Udaipur', 'Jaisalmer',
+          'Leh', 'Manali', 'Rishikesh', 'Varanasi', 'Ooty', 'Coorg', 'Gokarna', 'Pondicherry']
+HOTELS = ['Beach Resort', 'City Hotel', 'Hill View', 'Lake Palace', 'Desert Camp', 'River Lodge']
+
+
+def seed(rng, args):
+    # User 1 is the measured user: it gets the most friends, chats, budgets and bookings
+    db.session.execute(insert(User), [
+        {'email': f"user{i}@example.com", 'password': PASSWORD, 'name': f"User {i}", 'role': 'user'}
+        for i in range(1, args.users + 1)
+    ])
+    user_ids = list(range(1, args.users + 1))
+
+    pairs = set()
+    for other in rng.sample(user_ids[1:], min(args.friends, len(user_ids) - 1)):
+        pairs.add((1, other))
+    while len(pairs) < args.users * args.friends // 2:
+        a, b = rng.sample(user_ids, 2)
+        pairs.add((min(a, b), max(a, b)))
+    db.session.execute(insert(Friend), [
+        {'user_id': a, 'friend_id': b, 'status': 'accepted'} for pair in pairs for a, b in (pair, pair[::-1])
+    ])
+    db.session.commit()
+
+    my_friends = sorted(b for a, b in pairs if a == 1)
+    all_pairs = sorted(pairs)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(args.messages):
+        # Half of all traffic is in the measured user's conversations
+        a, b = (1, rng.choice(my_friends)) if rng.random() < 0.5 else rng.choice(all_pairs)
+        if rng.random() < 0.5:
+            a, b = b, a
+        rows.append({'sender_id': a, 'receiver_id': b, 'message': f"message {i}",
+                     'timestamp': start + timedelta(seconds=i)})
+        if len(rows) == 1000:
+            services.persist_messages(rows)
+            rows = []
+    if rows:
+        services.persist_messages(rows)
+
+    for i in range(args.packages):
+        services.create_package(
+            title=f"Package {i}",
+            description=f"{rng.randint(2, 10)} days around {rng.choice(PLACES)}",
+            price=rng.randrange(5000, 80000, 500),
+            total_days=rng.randint(2, 10),
+            image_path=None,
+            places=rng.sample(PLACES, 3),
+            hotels=rng.sample(HOTELS, 2),
+        )
+    package_ids = [row.id for row in db.session.query(Package.id)]
+
+    db.session.execute(insert(Budget), [
+        {'user_id': user_id, 'name': f"expense {i}", 'amount': rng.randrange(100, 5000),
+         'category': rng.choice(services.BUDGET_CATEGORIES)}
+        for user_id in (1, *rng.sample(user_ids, min(50, len(user_ids))))
+        for i in range(args.budgets)
+    ])
+    db.session.execute(insert(Booking), [
+        {'user_id': 1, 'package_id': package_id}
+        for package_id in rng.sample(package_ids, min(args.bookings, len(package_ids)))
+    ])
+    services.set_total_budget(1, 500000)
+    db.session.commit()
+    return my_friends
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(name, call, count, warmup):
+    for _ in range(warmup):
+        call()
+    timings, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        ok = call()
+        timings.append(time.perf_counter() - t0)
+        errors += not ok
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        'name': name,
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else None,
+        'mean_ms': ms(sum(timings) / len(timings)),
+        'p50_ms': ms(percentile(timings, 50)),
+        'p90_ms': ms(percentile(timings, 90)),
+        'p99_ms': ms(percentile(timings, 99)),
+        'max_ms': ms(timings[-1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--friends', type=int, default=20, help='average friends per user')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--packages', type=int, default=200)
+    parser.add_argument('--budgets', type=int, default=300, help='expenses per budgeting user')
+    parser.add_argument('--bookings', type=int, default=20, help='bookings of the measured user')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--profile', default='production', help='config profile (SQLite pragmas)')
+    parser.add_argument('--chat-write-mode', default='sync', choices=('sync', 'batched'))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = {key: getattr(CONFIGS[args.profile], key) for key in dir(CONFIGS[args.profile]) if key.isupper()}
+        settings.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            CHAT_WRITE_MODE=args.chat_write_mode,
+            SOCKETIO_ASYNC_MODE='threading',
+            SOCKETIO_MESSAGE_QUEUE=None,
+            WTF_CSRF_ENABLED=False,
+        )
+        app = create_app(settings)
+        seed_started = time.perf_counter()
+        with app.app_context():
+            db.create_all()
+            services.migrations.upgrade(db.engine)
+            my_friends = seed(rng, args)
+        seed_seconds = time.perf_counter() - seed_started
+
+        client = app.test_client()
+        client.post('/login', data={'email': 'user1@example.com', 'password': PASSWORD})
+        anonymous = app.test_client()
+        pages = max(1, -(-args.packages // app.config['PACKAGES_PAGE_SIZE']))
+        sock = socketio.test_client(app, flask_test_client=client)
+
+        def get(c, url):
+            return lambda: c.get(url() if callable(url) else url).status_code == 200
+
+        def send_message():
+            sock.emit('send_message', {'receiver_id': rng.choice(my_friends), 'message': 'benchmark'})
+            sock.get_received()
+            return True
+
+        scenarios = [
+            ('GET /packages (anonymous)', get(anonymous, lambda: f"/packages?page={rng.randint(1, pages)}")),
+            ('GET /packages', get(client, lambda: f"/packages?page={rng.randint(1, pages)}")),
+            ('GET /api/friends', get(client, '/api/friends')),
+            ('GET /api/messages/<id>', get(client, lambda: f"/api/messages/{rng.choice(my_friends)}")),
+            ('GET /budget', get(client, '/budget')),
+            ('GET /my_bookings', get(client, '/my_bookings')),
+            ('socket send_message', send_message),
+        ]
+        results = [measure(name, call, args.requests, args.warmup) for name, call in scenarios]
+
+        sock.disconnect()
+        if services.message_writer is not None:
+            services.message_writer.stop()
+        with app.app_context():
+            db.engine.dispose()
+
+    report = {
+        'scale': {key: getattr(args, key) for key in
+                  ('users', 'friends', 'messages', 'packages', 'budgets', 'bookings')},
+        'settings': {'profile': args.profile, 'chat_write_mode': args.chat_write_mode,
+                     'requests': args.requests, 'warmup': args.warmup, 'seed': args.seed},
+        'seed_seconds': round(seed_seconds, 2),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
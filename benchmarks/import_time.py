@@ -0,0 +1,72 @@
+"""Import-time profile of the application (python -X importtime).
+
+Measures, in fresh interpreters, how long `import app` and `create_app()` take,
+lists the slowest modules and checks that heavy optional dependencies are not
+imported at startup. Prints a JSON report so runs can be compared.
+
+    python benchmarks/import_time.py --top 15 --output import_time.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported on demand
+LAZY_MODULES = ('qrcode', 'PIL')
+
+STAGES = {
+    'import': "import app",
+    'create_app': "import app; app.create_app('testing')",
+}
+
+
+def profile(code):
+    # Returns (wall seconds, {module: (self_us, cumulative_us)})
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = {}
+    for stage, code in STAGES.items():
+        wall, modules = profile(code)
+        slowest = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)[:args.top]
+        report[stage] = {
+            'wall_seconds': round(wall, 4),
+            'import_seconds': round(sum(s for s, _ in modules.values()) / 1e6, 4),
+            'modules': len(modules),
+            'slowest': [{'module': name, 'cumulative_us': cum} for name, (_, cum) in slowest],
+            'eager_heavy_modules': sorted(m for m in LAZY_MODULES if m in modules),
+        }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    if any(stage['eager_heavy_modules'] for stage in report.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Time the itinerary generator on random trips of increasing size.
+
+Plans trips with randomly placed stops (given as "Name @ lat, lon") through
+planner.plan_trip, once cold (distance matrix and route computed) and once from
+the per-place-set cache, and prints the timings and route lengths as JSON.
+
+    python benchmarks/itinerary_planning.py --stops 25 50 100 200 --days 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+import planner  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stops', type=int, nargs='+', default=[25, 50, 100, 200])
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SOCKETIO_ASYNC_MODE': 'threading'})
+    results = []
+    with app.app_context():
+        for count in args.stops:
+            # Roughly the extent of India
+            stops = [f"Stop {i} @ {rng.uniform(8, 34):.4f}, {rng.uniform(69, 93):.4f}" for i in range(count)]
+            started = time.perf_counter()
+            plan = planner.plan_trip(stops, args.days)
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            planner.plan_trip(stops, args.days)
+            cached = time.perf_counter() - started
+            results.append({
+                'stops': count,
+                'days': args.days,
+                'cold_ms': round(cold * 1000, 2),
+                'cached_ms': round(cached * 1000, 2),
+                'total_km': plan['total_km'],
+                'stops_per_day': [len(day['stops']) for day in plan['days']],
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
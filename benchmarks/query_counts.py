@@ -0,0 +1,99 @@
+"""SQL statements per request for the authenticated budget/booking/itinerary routes.
+
+Drives each route once through the Flask test client against a throwaway SQLite
+file, counts the statements it executes and compares them with QUERY_BUDGETS.
+Exits with status 1 when a route goes over its budget, so it can run in CI as a
+regression check for extra per-request lookups.
+
+    python benchmarks/query_counts.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+import services  # noqa: E402
+
+# (method, path, form data) -> maximum statements, BEGIN/COMMIT not counted
+QUERY_BUDGETS = [
+    (('GET', '/budget', None), 3),
+    (('POST', '/budget', {'expense_name': 'Taxi', 'amount': '400', 'category': 'transport',
+                          'itinerary_id': '1'}), 1),
+    (('GET', '/api/budget/summary', None), 1),
+    (('GET', '/manage_expenses', None), 0),
+    (('POST', '/manage_expenses', {'expense_name': 'Lunch', 'amount': '250'}), 1),
+    (('POST', '/plan_itinerary', {'destination': 'Goa', 'start_date': '2026-01-01',
+                                  'end_date': '2026-01-04'}), 1),
+    (('GET', '/api/itineraries?start=2026-01-01&end=2026-01-31', None), 1),
+    (('GET', '/api/itineraries/friends?start=2026-01-01&end=2026-01-31', None), 1),
+    (('POST', '/book_package', {'package_title': 'Goa Getaway'}), 1),
+    (('GET', '/my_bookings', None), 1),
+]
+
+
+def count_queries(app, client, method, path, data):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = client.open(path, method=method, data=data)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return response.status_code, statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print the statements of each route')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'WTF_CSRF_ENABLED': False,
+            'SOCKETIO_ASYNC_MODE': 'threading',
+        })
+        with app.app_context():
+            services.initialize_admin()
+            services.create_user('planner@example.com', 'secret1')
+            user_id = services.check_user('planner@example.com', 'secret1')[1]
+            services.save_itinerary(user_id, 'Goa', date(2026, 1, 1), date(2026, 1, 4))
+
+        client = app.test_client()
+        client.post('/login', data={'email': 'planner@example.com', 'password': 'secret1'})
+        # Warm the user cache so every route is measured in its steady state
+        client.get('/budget')
+
+        results, over = [], []
+        for (method, path, data), budget in QUERY_BUDGETS:
+            status, statements = count_queries(app, client, method, path, data)
+            results.append({'route': f"{method} {path}", 'status': status,
+                            'statements': len(statements), 'budget': budget})
+            if args.verbose:
+                results[-1]['sql'] = statements
+            if len(statements) > budget:
+                over.append(results[-1])
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print(json.dumps(results, indent=2))
+    if over:
+        print("over budget: " + ", ".join(r['route'] for r in over), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Concurrent write throughput of the SQLite engine profiles in config.py.
+
+Runs the same workload against a throwaway database per profile: writer threads
+insert chat messages one transaction at a time (like save_dm_message) while
+reader threads page through a conversation (like get_dm_messages).
+
+    python benchmarks/sqlite_write_concurrency.py --writers 8 --messages 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIGS  # noqa: E402
+from sqlite_tuning import install_pragmas  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE message (
+    id INTEGER PRIMARY KEY,
+    sender_id INTEGER NOT NULL,
+    receiver_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def make_engine(path, profile):
+    options = dict(profile.SQLALCHEMY_ENGINE_OPTIONS)
+    engine = create_engine(f"sqlite:///{path}", **options)
+    install_pragmas(engine, profile.SQLITE_PRAGMAS)
+    return engine
+
+
+def run_profile(name, writers, readers, messages):
+    profile = CONFIGS[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, 'bench.db'), profile)
+        with engine.begin() as conn:
+            conn.execute(text(SCHEMA))
+
+        errors = []
+        done = threading.Event()
+
+        def write(worker):
+            for i in range(messages):
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("INSERT INTO message (sender_id, receiver_id, message) VALUES (:s, :r, :m)"),
+                            {'s': worker, 'r': worker + 1, 'm': f"message {i}"},
+                        )
+                except OperationalError as exc:
+                    errors.append(str(exc.orig))
+
+        def read():
+            while not done.is_set():
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(text("SELECT * FROM message ORDER BY id DESC LIMIT 50")).all()
+                except OperationalError as exc:
+                    errors.append(str(exc.orig))
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        for t in reader_threads:
+            t.start()
+        start = time.perf_counter()
+        for t in writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        for t in reader_threads:
+            t.join()
+
+        with engine.connect() as conn:
+            written = conn.execute(text("SELECT count(*) FROM message")).scalar()
+        engine.dispose()
+
+    return {
+        'profile': name,
+        'written': written,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(written / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=200, help='messages per writer')
+    parser.add_argument('--profiles', nargs='+', default=list(CONFIGS))
+    args = parser.parse_args()
+
+    results = [run_profile(p, args.writers, args.readers, args.messages) for p in args.profiles]
+    for r in results:
+        print(f"{r['profile']:<12} {r['writes_per_second']:>9} writes/s  "
+              f"{r['written']} written in {r['seconds']}s, {r['errors']} errors")
+    if len(results) > 1 and results[0]['writes_per_second']:
+        print(f"speedup: {results[-1]['writes_per_second'] / results[0]['writes_per_second']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
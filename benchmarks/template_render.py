@@ -0,0 +1,117 @@
+"""Server-side render time of the pages sharing the navbar and footer.
+
+Two measurements, printed as one JSON document:
+
+* first_request: a fresh interpreter creates the app and requests each page
+  once, as a newly started worker would. Run once with an empty Jinja bytecode
+  cache folder and once with the folder the first run filled.
+* per_request: p50/p90 of repeated requests by a logged-in user with the
+  navbar/footer fragment cache disabled (FRAGMENT_CACHE_SIZE=0) and enabled.
+
+    python benchmarks/template_render.py --requests 300
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = ['/', '/about', '/contact', '/packages', '/my_bookings', '/view_profile']
+EMAIL, PASSWORD = 'render@example.com', 'secret1'
+
+
+def make_app(db_path, **overrides):
+    from app import create_app
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SOCKETIO_ASYNC_MODE': 'threading',
+        'WTF_CSRF_ENABLED': False,
+        'ASSETS_AUTO_BUILD': False,
+    }
+    config.update(overrides)
+    return create_app(config)
+
+
+def logged_in_client(app):
+    client = app.test_client()
+    client.post('/login', data={'email': EMAIL, 'password': PASSWORD})
+    return client
+
+
+def first_request(db_path, cache_folder):
+    # Runs in a fresh interpreter: milliseconds until each page has rendered once
+    started = time.perf_counter()
+    app = make_app(db_path, JINJA_BYTECODE_CACHE_FOLDER=cache_folder)
+    client = logged_in_client(app)
+    timings = {}
+    for page in PAGES:
+        page_started = time.perf_counter()
+        assert client.get(page).status_code == 200, page
+        timings[page] = round((time.perf_counter() - page_started) * 1000, 2)
+    return {'pages_ms': timings, 'total_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def per_request(db_path, requests, **overrides):
+    app = make_app(db_path, JINJA_BYTECODE_CACHE=False, **overrides)
+    client = logged_in_client(app)
+    result = {}
+    for page in PAGES:
+        client.get(page)  # compile the templates first
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(page)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        result[page] = {
+            'p50_ms': round(statistics.median(samples), 3),
+            'p90_ms': round(samples[int(len(samples) * 0.9)], 3),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--first-request', nargs=2, metavar=('DB', 'CACHE_FOLDER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_request:
+        print(json.dumps(first_request(*args.first_request)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'render.db')
+        app = make_app(db_path, JINJA_BYTECODE_CACHE=False)
+        with app.app_context():
+            import services
+            services.initialize_admin()
+            services.create_user(EMAIL, PASSWORD)
+
+        cache_folder = os.path.join(tmp, 'jinja_cache')
+        report = {'first_request': {}, 'per_request': {}}
+        for run in ('empty_bytecode_cache', 'warm_bytecode_cache'):
+            proc = subprocess.run(
+                [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--first-request', db_path, cache_folder],
+                cwd=ROOT, capture_output=True, text=True, check=True,
+            )
+            report['first_request'][run] = json.loads(proc.stdout.strip().splitlines()[-1])
+        report['per_request']['fragment_cache_off'] = per_request(db_path, args.requests, FRAGMENT_CACHE_SIZE=0)
+        report['per_request']['fragment_cache_on'] = per_request(db_path, args.requests)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+from blueprints import admin, auth, chat, main, packages, planning, profile
+
+BLUEPRINTS = (main.bp, auth.bp, admin.bp, profile.bp, packages.bp, planning.bp, chat.bp)
+
+
+def register_blueprints(app):
+    for bp in BLUEPRINTS:
+        app.register_blueprint(bp)
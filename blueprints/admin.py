@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+from flask import (
+    Blueprint, Response, abort, current_app, jsonify, render_template, request, redirect, url_for, session,
+    flash, stream_with_context,
+)
+
+import images
+import metrics
+import package_io
+from services import (
+    admin_required, allowed_file, create_package, import_packages, export_packages,
+    booking_daily_stats, booking_package_stats,
+)
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/admin')
+def admin_dashboard():
+    if 'role' in session and session['role'] == 'admin':
+        return render_template('admin_dashboard.html')
+    else:
+        flash("Unauthorized access", "error")
+        return redirect(url_for('auth.login'))
+
+@bp.route('/add_package', methods=['GET', 'POST'])
+def add_package():
+    if 'role' not in session or session['role'] != 'admin':
+        flash('Admin access required.', 'error')
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        # Get form data
+        title = request.form.get('title')
+        description = request.form.get('description')
+        price = request.form.get('price')
+        total_days = request.form.get('total_days')
+        image_url = request.form.get('image_url')
+        image = request.files.get('image')
+        if image and allowed_file(image.filename):
+            try:
+                image_url = images.save_upload(image, 'package')
+            except images.ImageError as e:
+                flash(str(e), 'error')
+                return redirect(url_for('admin.admin_dashboard'))
+        places = request.form.getlist('places')  # Multiple places
+        hotels = request.form.getlist('hotels')  # Multiple hotels
+
+        # Save the package to the database
+        create_package(title, description, price, total_days, image_url, places, hotels)
+        flash('Package added successfully!', 'success')
+        return redirect(url_for('admin.admin_dashboard'))
+
+    return render_template('add_package.html')
+
+@bp.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    # Prometheus text exposition of this worker's counters (METRICS_ENABLED)
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    return metrics.registry.prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@bp.route('/admin/packages/import', methods=['POST'])
+@admin_required
+def bulk_import_packages():
+    upload = request.files.get('file')
+    fmt = request.form.get('format') or package_io.detect_format(upload.filename if upload else None)
+    if not upload or fmt not in package_io.FORMATS:
+        error = 'Upload a .csv or .jsonl file (JSON Lines: one object per line, not a JSON array).'
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': error}), 400
+        return render_template('import_report.html', report=None, error=error), 400
+
+    report = import_packages(upload.stream, fmt)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(report)
+    return render_template('import_report.html', report=report, error=None)
+
+@bp.route('/admin/packages/export.<fmt>')
+@admin_required
+def bulk_export_packages(fmt):
+    if fmt not in package_io.FORMATS:
+        abort(404)
+    response = Response(stream_with_context(export_packages(fmt)), mimetype=package_io.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=packages.{fmt}'
+    return response
+
+def _analytics_window():
+    # ?start=&end= (ISO dates); defaults to the last ANALYTICS_WINDOW_DAYS days
+    try:
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else date.today()
+        start = (date.fromisoformat(request.args['start']) if request.args.get('start')
+                 else end - timedelta(days=current_app.config['ANALYTICS_WINDOW_DAYS'] - 1))
+    except ValueError:
+        return None, 'start and end must be YYYY-MM-DD'
+    if end < start:
+        return None, 'end is before start'
+    if (end - start).days >= current_app.config['ANALYTICS_MAX_WINDOW_DAYS']:
+        return None, f"the window can span at most {current_app.config['ANALYTICS_MAX_WINDOW_DAYS']} days"
+    return (start, end), None
+
+@bp.route('/admin/analytics/bookings')
+@admin_required
+def analytics_bookings():
+    # Daily bookings and revenue, optionally for one package (?package_id=)
+    window, error = _analytics_window()
+    if error:
+        return jsonify({'error': error}), 400
+    package_id = request.args.get('package_id', type=int)
+    return jsonify({'start': window[0].isoformat(), 'end': window[1].isoformat(), 'package_id': package_id,
+                    'days': booking_daily_stats(*window, package_id=package_id)})
+
+@bp.route('/admin/analytics/packages')
+@admin_required
+def analytics_packages():
+    # Packages ranked by revenue over the window
+    window, error = _analytics_window()
+    if error:
+        return jsonify({'error': error}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    return jsonify({'start': window[0].isoformat(), 'end': window[1].isoformat(),
+                    'packages': booking_package_stats(*window, limit=limit)})
@@ -0,0 +1,44 @@
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+
+from forms import LoginForm
+from services import create_user, check_user
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        create_user(email, password)
+        flash('Account created! Please login.', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('signup.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    form = LoginForm()
+    if form.validate_on_submit():
+        email = form.email.data
+        password = form.password.data
+        role, user_id = check_user(email, password)
+
+        if role:
+            session['email'] = email
+            session['role'] = role
+            session['user_id'] = user_id
+
+            if role == 'admin':
+                return redirect(url_for('admin.admin_dashboard'))
+            else:
+                return redirect(url_for('main.index'))
+        else:
+            flash('Invalid credentials', 'error')
+    return render_template('login.html', form=form)
+
+@bp.route('/logout')
+def logout():
+    session.clear()
+    flash('You have been logged out.', 'success')
+    return redirect(url_for('main.landing'))
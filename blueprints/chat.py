@@ -0,0 +1,184 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, jsonify
+from flask_socketio import emit, join_room
+
+import metrics
+from extensions import socketio
+from services import (
+    get_suggested_friends, get_friend_requests, get_friends, get_current_user, add_friend,
+    accept_friend, get_dm_messages, save_dm_message, get_conversations, mark_conversation_read,
+)
+
+bp = Blueprint('chat', __name__)
+
+
+@bp.route('/group_chat')
+def group_chat():
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('auth.login'))
+    suggested = get_suggested_friends(user_id)
+    requests = get_friend_requests(user_id)
+    friends = get_friends(user_id)
+    user = get_current_user()
+    unread = {c['friend_id']: c['unread'] for c in get_conversations(user_id) if c['unread']}
+    return render_template(
+        'chat.html',
+        suggested=suggested,
+        requests=requests,
+        friends=friends,
+        unread=unread,
+        user=user,
+        socketio_transports=current_app.config['SOCKETIO_TRANSPORTS'],
+    )
+
+@bp.route('/api/friends')
+def api_friends():
+    user_id = session['user_id']
+    limit = request.args.get('limit', current_app.config['SUGGESTIONS_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, 100))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    friends = get_friends(user_id)
+    requests = get_friend_requests(user_id)
+    suggested = get_suggested_friends(user_id, limit=limit, offset=offset)
+    return jsonify({
+        'friends': friends,
+        'requests': requests,
+        'suggested': suggested,
+        'suggested_next_offset': offset + limit if len(suggested) == limit else None,
+        'current_user_id': user_id
+    })
+
+@bp.route('/api/add_friend', methods=['POST'])
+def api_add_friend():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    data = request.get_json()
+    friend_id = data.get('friend_id')
+    if not friend_id:
+        return jsonify({'error': 'Missing friend_id'}), 400
+
+    user_id = session['user_id']
+    add_friend(user_id, friend_id)
+    return jsonify({'message': 'Friend request sent!'}), 200
+
+@bp.route('/api/accept_friend', methods=['POST'])
+def api_accept_friend():
+    user_id = session['user_id']
+    friend_id = request.json['friend_id']
+    accept_friend(user_id, friend_id)
+    return '', 204
+
+@bp.route('/api/messages/<int:friend_id>')
+def api_messages(friend_id):
+    user_id = session['user_id']
+    before = request.args.get('before', type=int)
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', current_app.config['DM_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['DM_MAX_PAGE_SIZE']))
+
+    messages = get_dm_messages(user_id, friend_id, before=before, since=since, limit=limit)
+    has_more = len(messages) == limit
+    return jsonify({
+        'messages': messages,
+        'current_user_id': user_id,
+        'has_more': has_more,
+        # Cursor for the next older page (None once the start of history is reached)
+        'before': messages[0]['id'] if messages and has_more and since is None else None,
+        # Cursor for incremental fetches of newer messages
+        'since': messages[-1]['id'] if messages else since,
+    })
+
+@bp.route('/api/conversations')
+def api_conversations():
+    user_id = session['user_id']
+    limit = request.args.get('limit', current_app.config['INBOX_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['INBOX_PAGE_SIZE']))
+    conversations = get_conversations(user_id, limit=limit)
+    return jsonify({
+        'conversations': conversations,
+        'unread_total': sum(c['unread'] for c in conversations),
+        'current_user_id': user_id,
+    })
+
+@bp.route('/api/conversations/<int:friend_id>/read', methods=['POST'])
+def api_mark_read(friend_id):
+    user_id = session['user_id']
+    last_read_id = mark_conversation_read(user_id, friend_id)
+    socketio.emit('messages_read', {'reader_id': user_id, 'last_read_id': last_read_id},
+                  room=f"user_{friend_id}")
+    return '', 204
+
+# ------------------ SocketIO Events ------------------
+
+@socketio.on('connect')
+@metrics.socket_event
+def handle_connect(auth=None):
+    # Rooms are per connection and per worker: rejoin the personal room on every
+    # (re)connect, whichever worker the client lands on. DM rooms are rejoined
+    # by the page's own 'connect' handler.
+    user_id = session.get('user_id')
+    if user_id:
+        join_room(f"user_{user_id}")
+
+@socketio.on('join_user_room')
+@metrics.socket_event
+def handle_join_user_room(data):
+    user_id = session['user_id']
+    join_room(f"user_{user_id}")
+
+@socketio.on('send_friend_request')
+@metrics.socket_event
+def handle_send_friend_request(data):
+    sender_id = session['user_id']
+    receiver_id = data['friend_id']
+    add_friend(sender_id, receiver_id)
+    # Notify the receiver in real-time
+    emit('receive_friend_request', {'from_id': sender_id}, room=f"user_{receiver_id}")
+
+@socketio.on('accept_friend_request')
+@metrics.socket_event
+def handle_accept_friend_request(data):
+    user_id = session['user_id']
+    friend_id = data['friend_id']
+    accept_friend(user_id, friend_id)
+    # Notify both users
+    emit('friend_request_accepted', {'friend_id': user_id}, room=f"user_{friend_id}")
+    emit('friend_request_accepted', {'friend_id': friend_id}, room=f"user_{user_id}")
+
+@socketio.on('send_message')
+@metrics.socket_event
+def handle_send_message(data):
+    sender_id = session['user_id']
+    receiver_id = data['receiver_id']
+    message = data['message']
+    saved = save_dm_message(sender_id, receiver_id, message)
+    room = f"dm_{min(sender_id, receiver_id)}_{max(sender_id, receiver_id)}"
+    # The sender is in the room too: this echo is what renders their own message
+    emit('new_message', dict(saved, receiver_id=receiver_id), room=room)
+    # Lets the receiver bump the unread badge of a chat that is not open
+    emit('unread_message', {'from_id': sender_id}, room=f"user_{receiver_id}")
+
+@socketio.on('mark_read')
+@metrics.socket_event
+def handle_mark_read(data):
+    # Read receipt: clear my unread counter and tell the other side
+    user_id = session['user_id']
+    friend_id = data['friend_id']
+    last_read_id = mark_conversation_read(user_id, friend_id)
+    emit('messages_read', {'reader_id': user_id, 'last_read_id': last_read_id},
+         room=f"user_{friend_id}")
+
+@socketio.on('join_dm')
+@metrics.socket_event
+def handle_join_dm(data):
+    user_id = session['user_id']
+    friend_id = data['friend_id']
+    room = f"dm_{min(user_id, friend_id)}_{max(user_id, friend_id)}"
+    join_room(room)
+
+@socketio.on('friend_accepted')
+@metrics.socket_event
+def handle_friend_accepted(data):
+    # Optionally, broadcast to the friend that the request was accepted
+    emit('friend_accepted', {}, broadcast=True)
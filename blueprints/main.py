@@ -0,0 +1,51 @@
+import os
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash, make_response, abort
+
+import qr
+from services import fetch_concepts
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+@bp.route('/landing')
+def landing():
+    if 'email' not in session:
+        return redirect(url_for('auth.login'))
+    concepts = fetch_concepts()
+    return render_template('index.html', email=session['email'], role=session['role'], concepts=concepts)
+
+@bp.route('/contact')
+def contact():
+    return render_template('contact.html')
+
+@bp.route('/about')
+def about():
+    return render_template('about.html')
+
+@bp.route('/enjoy_more')
+def enjoy_more():
+    if 'email' not in session:
+        flash('Please log in to access the Enjoy More feature.', 'error')
+        return redirect(url_for('auth.login'))
+    return render_template('enjoy_more.html')
+
+@bp.route('/qr.<fmt>')
+def website_qr(fmt):
+    if fmt not in qr.FORMATS:
+        abort(404)
+    size = request.args.get('size', 'medium')
+    if size not in qr.SIZES:
+        abort(400)
+    cache_dir = current_app.config['QR_CACHE_FOLDER'] or os.path.join(current_app.instance_path, 'qr')
+    key, data = qr.qr_code(current_app.config['SITE_URL'], fmt, size, cache_dir=cache_dir)
+    response = make_response(data)
+    response.mimetype = qr.FORMATS[fmt]
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash, jsonify, make_response
+
+import assets
+import catalog
+from extensions import db
+from services import fetch_package_page, package_listing_cache, fetch_user_bookings, save_booking, search_packages
+
+bp = Blueprint('packages', __name__)
+
+
+@bp.route('/packages')
+def packages():
+    per_page = request.args.get('per_page', current_app.config['PACKAGES_PAGE_SIZE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['PACKAGES_MAX_PAGE_SIZE']))
+    page = max(1, request.args.get('page', 1, type=int))
+    listing = fetch_package_page(page, per_page)
+    page = listing['page']
+
+    if 'user_id' in session:
+        # Per-user navbar and CSRF tokens: render every time, never share
+        response = make_response(render_template('packages.html', **listing))
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    # Anonymous pages are identical for everyone, so the rendered HTML is cached
+    # per catalog version and asset build (the page links to hashed assets) and
+    # revalidated by browsers/proxies with a strong ETag
+    version, updated_at = package_listing_cache.version(db.session)
+    build, built_at = assets.build_version()
+    key = (version, build, 'html', page, per_page)
+    body = package_listing_cache.get(key)
+    if body is None:
+        body = render_template('packages.html', **listing)
+        package_listing_cache.set(key, body)
+    response = make_response(body)
+    response.set_etag(hashlib.sha1(f"{version}:{build}:{page}:{per_page}".encode()).hexdigest())
+    response.last_modified = datetime.fromtimestamp(max(updated_at, built_at), timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+@bp.route('/book_package', methods=['POST'])
+def book_package():
+    user_id = session['user_id']
+    if save_booking(user_id, request.form['package_title']):
+        flash('Package booked successfully!', 'success')
+    else:
+        flash('That package is no longer available.', 'error')
+    return redirect(url_for('packages.my_bookings'))
+
+@bp.route('/my_bookings')
+def my_bookings():
+    if 'email' not in session:
+        flash('Please log in to view your bookings.', 'error')
+        return redirect(url_for('auth.login'))
+
+    bookings = fetch_user_bookings(session['user_id'])
+    return render_template('my_bookings.html', bookings=bookings)
+
+@bp.route('/api/packages/search')
+def api_search_packages():
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    results = search_packages(
+        places=request.args.getlist('place'),
+        hotels=request.args.getlist('hotel'),
+        min_price=request.args.get('min_price', type=float),
+        max_price=request.args.get('max_price', type=float),
+        min_days=request.args.get('min_days', type=int),
+        max_days=request.args.get('max_days', type=int),
+        limit=limit,
+        offset=offset,
+    )
+    return jsonify({
+        'packages': results,
+        'next_offset': offset + limit if len(results) == limit else None,
+    })
+
+@bp.route('/api/packages/text_search')
+def api_text_search_packages():
+    # Ranked, prefix-matching full-text search for the type-ahead on /packages
+    q = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    results = catalog.full_text_search(db.session, q, limit=limit, offset=offset)
+    return jsonify({
+        'query': q,
+        'packages': results,
+        'next_offset': offset + limit if len(results) == limit else None,
+    })
@@ -0,0 +1,227 @@
+from datetime import date, timedelta
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, session, flash, jsonify
+
+from services import (
+    fetch_budget, create_budget, budget_summary, set_total_budget, fetch_itineraries, BUDGET_CATEGORIES,
+    create_tip, fetch_tips, save_itinerary, fetch_itinerary, fetch_itineraries_between, fetch_friends_travelling,
+    build_itinerary_plan, fetch_previous_trips,
+    get_suggested_friends,
+)
+
+bp = Blueprint('planning', __name__)
+
+
+@bp.route('/budget', methods=['GET', 'POST'])
+def budget():
+    if 'email' not in session:
+        flash('Please log in to access the Budget Tracker.', 'error')
+        return redirect(url_for('auth.login'))
+
+    email = session['email']
+    user_id = session['user_id']
+
+    if request.method == 'POST':
+        if 'total_budget' in request.form:
+            set_total_budget(user_id, float(request.form['total_budget']))
+        if request.form.get('expense_name'):
+            create_budget(user_id, request.form['expense_name'], request.form['amount'],
+                          category=request.form.get('category'),
+                          itinerary_id=request.form.get('itinerary_id', type=int))
+            flash('Budget item added successfully!', 'success')
+        return redirect(url_for('planning.budget'))
+
+    # Latest expenses for the table; totals and rollups come from the database
+    budget_items = fetch_budget(user_id, limit=current_app.config['BUDGET_ITEMS_SHOWN'])
+    summary = budget_summary(user_id)
+    return render_template(
+        'budget.html',
+        email=email,
+        budget_items=budget_items,
+        summary=summary,
+        total_budget=summary['total_budget'],
+        categories=BUDGET_CATEGORIES,
+        itineraries=fetch_itineraries(user_id),
+    )
+
+@bp.route('/api/budget/summary')
+def api_budget_summary():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    return jsonify(budget_summary(session['user_id']))
+
+@bp.route('/manage_expenses', methods=['GET', 'POST'])
+def manage_expenses():
+    if 'email' not in session:
+        flash('Please log in to access the Manage Expenses feature.', 'error')
+        return redirect(url_for('auth.login'))
+
+    email = session['email']
+
+    if request.method == 'POST':
+        expense_name = request.form['expense_name']
+        amount = request.form['amount']
+
+        # Add the expense to the database
+        create_budget(session['user_id'], expense_name, amount, category=request.form.get('category'))
+        flash('Expense added successfully!', 'success')
+        return redirect(url_for('planning.manage_expenses'))
+
+    return render_template('manage_expenses.html', email=email)
+
+@bp.route('/plan_smart', methods=['GET', 'POST'])
+def plan_smart():
+    if 'email' not in session:
+        flash('Please log in to access the Plan Smart feature.', 'error')
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        tip = (request.form.get('tip') or '').strip()
+        if len(tip) > current_app.config['TIP_MAX_LENGTH']:
+            flash(f"Tips can be at most {current_app.config['TIP_MAX_LENGTH']} characters.", 'error')
+        elif tip:
+            if create_tip(session['user_id'], tip):
+                flash('Your tip has been added successfully!', 'success')
+            else:
+                flash('That tip has already been shared.', 'info')
+        return redirect(url_for('planning.plan_smart'))
+
+    # Fetch one page of tips for the Plan Smart page
+    before = request.args.get('before', type=int)
+    tips, older = fetch_tips(before=before)
+    return render_template('plan_smart.html', email=session['email'], tips=tips, older_tips=older)
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value or '')
+    except ValueError:
+        return None
+
+def _trip_days(start, end):
+    # Length of the trip from its dates, or None when they are missing or reversed
+    if start is None or end is None or end < start:
+        return None
+    return min((end - start).days + 1, current_app.config['ITINERARY_MAX_DAYS'])
+
+def _date_window():
+    # ?start=&end= for the calendar APIs; defaults to the next ITINERARY_WINDOW_DAYS
+    start = _parse_date(request.args.get('start')) or date.today()
+    end = _parse_date(request.args.get('end')) or start + timedelta(days=current_app.config['ITINERARY_WINDOW_DAYS'])
+    if end < start:
+        return None, 'end is before start'
+    if (end - start).days > current_app.config['ITINERARY_MAX_WINDOW_DAYS']:
+        return None, f"the window can span at most {current_app.config['ITINERARY_MAX_WINDOW_DAYS']} days"
+    return (start, end), None
+
+def _trip_json(trip):
+    return dict(trip, start_date=trip['start_date'] and trip['start_date'].isoformat(),
+                end_date=trip['end_date'] and trip['end_date'].isoformat())
+
+@bp.route('/plan_itinerary', methods=['GET', 'POST'])
+def plan_itinerary():
+    if 'email' not in session:
+        flash('Please log in to access the Plan Itinerary feature.', 'error')
+        return redirect(url_for('auth.login'))
+
+    user_id = session['user_id']
+    if request.method == 'POST':
+        destination = (request.form.get('destination') or '').strip()
+        start_date = _parse_date(request.form.get('start_date'))
+        end_date = _parse_date(request.form.get('end_date'))
+        if not destination or start_date is None or end_date is None:
+            flash('Please enter a destination and valid start and end dates.', 'error')
+            return redirect(url_for('planning.plan_itinerary'))
+        if end_date < start_date:
+            flash('The trip cannot end before it starts.', 'error')
+            return redirect(url_for('planning.plan_itinerary'))
+        package_title = (request.form.get('package') or '').strip() or None
+        # One stop per line, optionally "Name @ lat, lon"
+        stops = [line.strip() for line in (request.form.get('stops') or '').splitlines() if line.strip()]
+        if len(stops) > current_app.config['ITINERARY_MAX_STOPS']:
+            flash(f"An itinerary can have at most {current_app.config['ITINERARY_MAX_STOPS']} stops.", 'error')
+            return redirect(url_for('planning.plan_itinerary'))
+
+        plan = None
+        if package_title or stops:
+            plan = build_itinerary_plan(_trip_days(start_date, end_date), start_date, package_title, stops)
+            if plan is None:
+                flash(f"No package named {package_title}.", 'error')
+                return redirect(url_for('planning.plan_itinerary'))
+
+        itinerary_id = save_itinerary(user_id, destination, start_date, end_date, plan=plan)
+        flash('Itinerary planned successfully!', 'success')
+        return redirect(url_for('planning.plan_itinerary', itinerary_id=itinerary_id))
+
+    itinerary_id = request.args.get('itinerary_id', type=int)
+    itinerary = fetch_itinerary(user_id, itinerary_id) if itinerary_id else None
+    return render_template('plan_itinerary.html', itinerary=itinerary, itineraries=fetch_itineraries(user_id))
+
+@bp.route('/api/itinerary/plan')
+def api_itinerary_plan():
+    # Plans without saving: ?package=<title>&stop=<name>&stop=...&start_date=&end_date=
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    stops = [stop for stop in request.args.getlist('stop') if stop.strip()]
+    if len(stops) > current_app.config['ITINERARY_MAX_STOPS']:
+        return jsonify({'error': 'Too many stops'}), 400
+    start_date = _parse_date(request.args.get('start_date'))
+    days = _trip_days(start_date, _parse_date(request.args.get('end_date')))
+    if days is None and request.args.get('days', type=int):
+        days = max(1, min(request.args.get('days', type=int), current_app.config['ITINERARY_MAX_DAYS']))
+    plan = build_itinerary_plan(days, start_date, request.args.get('package'), stops)
+    if plan is None:
+        return jsonify({'error': 'Package not found'}), 404
+    return jsonify(plan)
+
+@bp.route('/api/itineraries')
+def api_itineraries():
+    # The user's trips overlapping ?start=&end= (a calendar view)
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    window, error = _date_window()
+    if error:
+        return jsonify({'error': error}), 400
+    trips = fetch_itineraries_between(session['user_id'], *window)
+    return jsonify({'start': window[0].isoformat(), 'end': window[1].isoformat(),
+                    'trips': [_trip_json(trip) for trip in trips]})
+
+@bp.route('/api/itineraries/friends')
+def api_friends_travelling():
+    # Friends travelling during the user's trips in ?start=&end=
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    window, error = _date_window()
+    if error:
+        return jsonify({'error': error}), 400
+    trips = fetch_friends_travelling(session['user_id'], *window)
+    return jsonify({'start': window[0].isoformat(), 'end': window[1].isoformat(),
+                    'trips': [dict(_trip_json(trip), friends=[_trip_json(f) for f in trip['friends']])
+                              for trip in trips]})
+
+@bp.route('/previous_trips')
+def previous_trips():
+    if 'email' not in session:
+        flash('Please log in to view your previous trips.', 'error')
+        return redirect(url_for('auth.login'))
+
+    # Fetch previous trips from the database
+    trips = fetch_previous_trips(session['user_id'])
+    return render_template('previous_trips.html', trips=trips)
+
+@bp.route('/my_trips', methods=['GET', 'POST'])
+def my_trips():
+    user_id = session['user_id']
+    if request.method == 'POST':
+        # Create or update trip
+        data = request.form
+        # ...save to DB...
+        return redirect(url_for('planning.my_trips'))
+    # Not implemented fully; show chat suggestions instead
+    trips = []
+    suggested_friends = get_suggested_friends(user_id)
+    return render_template('my_trips.html', trips=trips, suggested_friends=suggested_friends)
+
+@bp.route('/delete_trip/<int:trip_id>', methods=['POST'])
+def delete_trip(trip_id):
+    # ...delete from DB...
+    return '', 204
@@ -0,0 +1,45 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+
+import images
+from services import get_current_user, allowed_file, update_user_profile
+
+bp = Blueprint('profile', __name__)
+
+
+@bp.route('/view_profile')
+def view_profile():
+    user = get_current_user()  # ✅ Use the correct function
+    if not user:
+        flash("Please log in to view your profile.", "error")
+        return redirect(url_for('auth.login'))
+    return render_template('view_profile.html', user=user)
+
+@bp.route('/edit_profile', methods=['GET', 'POST'])
+def edit_profile():
+    user = get_current_user()
+    if not user:
+        flash("Please log in to edit your profile.", "error")
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        name = request.form.get('name')
+        email = request.form.get('email')
+        phone = request.form.get('phone')
+        emergency_contact = request.form.get('emergency_contact')
+        file = request.files.get('profile_pic')
+
+        profile_pic = user.get('profile_pic')
+        if file and allowed_file(file.filename):
+            try:
+                profile_pic = images.save_upload(file, 'profile')
+            except images.ImageError as e:
+                flash(str(e), "error")
+                return redirect(url_for('profile.edit_profile'))
+
+        # Update user in DB
+        update_user_profile(user['id'], name=name, phone=phone, profile_pic=profile_pic, email=email, emergency_contact=emergency_contact)
+
+        flash("Profile updated successfully!", "success")
+        return redirect(url_for('profile.view_profile'))
+
+    return render_template('edit_profile.html', user=user)
@@ -0,0 +1,201 @@
+import re
+import threading
+import time
+
+from markupsafe import escape
+from sqlalchemy import text
+
+# ------------------ Package Places / Hotels ------------------
+#
+# Places and hotels live in their own tables (place, hotel) linked to packages
+# through package_place / package_hotel, which keep the admin-entered order in
+# `position`. Package.places/hotels keep a comma-joined copy for display.
+
+LINK_KINDS = ('place', 'hotel')
+
+
+def clean_names(names):
+    # Strip, drop blanks and de-duplicate (case-insensitively) keeping the first spelling
+    seen = set()
+    result = []
+    for name in names or []:
+        name = (name or '').strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            result.append(name)
+    return result
+
+
+def split_names(value):
+    return clean_names((value or '').split(','))
+
+
+def replace_package_links(conn, package_id, places, hotels):
+    # Replace the place/hotel links of one package; `conn` is a Connection or Session
+    for kind, names in zip(LINK_KINDS, (places, hotels)):
+        names = clean_names(names)
+        conn.execute(text(f"DELETE FROM package_{kind} WHERE package_id = :pid"), {'pid': package_id})
+        if not names:
+            continue
+        conn.execute(
+            text(f"INSERT OR IGNORE INTO {kind} (name) VALUES (:name)"),
+            [{'name': name} for name in names],
+        )
+        conn.execute(
+            text(
+                f"INSERT INTO package_{kind} (package_id, {kind}_id, position) "
+                f"SELECT :pid, id, :pos FROM {kind} WHERE name = :name"
+            ),
+            [{'pid': package_id, 'pos': pos, 'name': name} for pos, name in enumerate(names)],
+        )
+
+
+def delete_package_links(conn, package_id):
+    for kind in LINK_KINDS:
+        conn.execute(text(f"DELETE FROM package_{kind} WHERE package_id = :pid"), {'pid': package_id})
+
+
+def backfill_package_links(conn, batch_size=500):
+    # Migration step: build the link tables from the comma-separated text columns
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, places, hotels FROM package WHERE id > :last ORDER BY id LIMIT :n"),
+            {'last': last_id, 'n': batch_size},
+        ).all()
+        if not rows:
+            break
+        for package_id, places, hotels in rows:
+            replace_package_links(conn, package_id, split_names(places), split_names(hotels))
+        last_id = rows[-1][0]
+
+
+# ------------------ Full-Text Search ------------------
+#
+# package_fts is an external-content FTS5 index over the package table; triggers
+# created by migration 5 keep it in sync with every INSERT/UPDATE/DELETE, so
+# create_package, update_package and delete_package need no extra calls.
+
+FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS package_fts_insert AFTER INSERT ON package BEGIN"
+    " INSERT INTO package_fts (rowid, title, description, places, hotels)"
+    " VALUES (new.id, new.title, new.description, new.places, new.hotels);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS package_fts_delete AFTER DELETE ON package BEGIN"
+    " INSERT INTO package_fts (package_fts, rowid, title, description, places, hotels)"
+    " VALUES ('delete', old.id, old.title, old.description, old.places, old.hotels);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS package_fts_update AFTER UPDATE ON package BEGIN"
+    " INSERT INTO package_fts (package_fts, rowid, title, description, places, hotels)"
+    " VALUES ('delete', old.id, old.title, old.description, old.places, old.hotels);"
+    " INSERT INTO package_fts (rowid, title, description, places, hotels)"
+    " VALUES (new.id, new.title, new.description, new.places, new.hotels);"
+    " END",
+]
+
+# bm25 weights per column: title, description, places, hotels
+FTS_WEIGHTS = (10.0, 1.0, 5.0, 3.0)
+
+# Private-use markers around snippet matches, swapped for <mark> after escaping
+_MARK_OPEN, _MARK_CLOSE = '\ue000', '\ue001'
+
+
+def fts_query(user_input):
+    # Turn free text into an FTS5 query: every word must match, as a prefix
+    words = re.findall(r'\w+', user_input or '')
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def _highlight(snippet):
+    return (str(escape(snippet or ''))
+            .replace(_MARK_OPEN, '<mark>')
+            .replace(_MARK_CLOSE, '</mark>'))
+
+
+def full_text_search(conn, user_input, limit=20, offset=0):
+    match = fts_query(user_input)
+    if not match:
+        return []
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    rows = conn.execute(
+        text(
+            "SELECT package.id, package.title, package.price, package.total_days, package.image_path,"
+            " snippet(package_fts, 1, :open, :close, '…', 12) AS snippet,"
+            f" bm25(package_fts, {weights}) AS score"
+            " FROM package_fts JOIN package ON package.id = package_fts.rowid"
+            " WHERE package_fts MATCH :match"
+            " ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {'match': match, 'open': _MARK_OPEN, 'close': _MARK_CLOSE, 'limit': limit, 'offset': offset},
+    ).all()
+    return [
+        {
+            'id': r.id,
+            'title': r.title,
+            'price': r.price,
+            'total_days': r.total_days,
+            'image_path': r.image_path,
+            # HTML-escaped description excerpt with matches wrapped in <mark>
+            'snippet': _highlight(r.snippet),
+            'score': round(-r.score, 4),
+        }
+        for r in rows
+    ]
+
+
+# ------------------ Listing Version / Cache ------------------
+#
+# catalog_state holds a single row whose version is bumped by triggers on every
+# package change, so all workers agree on when cached listings went stale.
+
+VERSION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS catalog_version_{event.lower()} AFTER {event} ON package BEGIN"
+    " UPDATE catalog_state SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)"
+    " WHERE id = 1;"
+    " END"
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+
+def catalog_version(conn):
+    # (version, unix timestamp of the last change)
+    row = conn.execute(text("SELECT version, updated_at FROM catalog_state WHERE id = 1")).first()
+    return (row.version, row.updated_at) if row else (0, 0)
+
+
+class ListingCache:
+    # In-process cache of listing pages for the current catalog version. The
+    # version itself is re-read from the database at most every `ttl` seconds.
+
+    def __init__(self, ttl=1.0, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._version = None
+        self._checked_at = 0.0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version(self, conn):
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.ttl:
+            version = catalog_version(conn)
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                self._version = version
+                self._checked_at = now
+        return self._version
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[key] = value
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._entries.clear()
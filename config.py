@@ -1 +1,180 @@
-DB_URL = "mongodb://localhost:27017"
\ No newline at end of file
+import os
+
+# ------------------ Configuration Profiles ------------------
+#
+# Select a profile with the TRIPMATE_CONFIG environment variable
+# (development, testing, production). Development keeps SQLite's defaults.
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key_here')
+
+    # Public address encoded in the website QR code (/qr.png, /qr.svg)
+    SITE_URL = os.environ.get('SITE_URL', 'http://192.168.223.35:5000')
+    QR_CACHE_FOLDER = None  # defaults to <instance>/qr
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///tripmate.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    # PRAGMA name -> value, applied to every new SQLite connection
+    SQLITE_PRAGMAS = {}
+
+    # File uploads
+    UPLOAD_FOLDER = None  # defaults to <static>/uploads
+    PROFILE_PICS_FOLDER = None  # defaults to <static>/profile_pics
+    # Uploaded images are resized into WebP/JPEG thumbnails by a background pool
+    # (images.py); larger files or dimensions are rejected
+    IMAGE_MAX_BYTES = 10 * 1024 * 1024
+    IMAGE_MAX_PIXELS = 40_000_000
+    IMAGE_QUALITY = 80
+    IMAGE_WORKERS = 2
+
+    # Static asset pipeline (assets.py): minified, content-hashed copies of
+    # static/css, static/js and the page bundles in static/dist, which
+    # url_for('static', ...) points at and which are cached for ASSETS_MAX_AGE
+    # seconds as immutable. ASSETS_AUTO_BUILD rebuilds them at startup when a
+    # source is newer than the manifest; otherwise run `flask build-assets`.
+    ASSETS_ENABLED = True
+    ASSETS_AUTO_BUILD = True
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+
+    # Templates: compiled bytecode is kept on disk so new workers skip Jinja's
+    # compilation, and the navbar/footer are rendered once per user and worker
+    # and reused for FRAGMENT_CACHE_TTL seconds (set FRAGMENT_CACHE_SIZE to 0 to
+    # disable). A profile change only refreshes the navbar on the worker that
+    # handled it; other workers catch up when the entry expires.
+    JINJA_BYTECODE_CACHE = True
+    JINJA_BYTECODE_CACHE_FOLDER = None  # defaults to <instance>/jinja_cache
+    FRAGMENT_CACHE_SIZE = 1024
+    FRAGMENT_CACHE_TTL = 60  # seconds
+
+    # None lets Flask-SocketIO pick eventlet when it is installed
+    SOCKETIO_ASYNC_MODE = None
+    # Cross-process fan-out for multiple workers: a Flask-SocketIO message queue
+    # URL (redis://, amqp://, ...) or local://host:port for the bundled broker
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = 'tripmate'
+    # Transports offered to the browser. Long-polling needs sticky sessions at
+    # the load balancer; ['websocket'] works without them.
+    SOCKETIO_TRANSPORTS = ['polling', 'websocket']
+
+    # Process-wide user cache; set USER_CACHE_SIZE to 0 to disable it
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL = 60  # seconds
+
+    # Messages returned per page by the DM history API
+    DM_PAGE_SIZE = 50
+    DM_MAX_PAGE_SIZE = 200
+    # Conversations returned by the inbox API
+    INBOX_PAGE_SIZE = 50
+
+    # Per-route / per-socket-event SQL and latency metrics, served as Prometheus
+    # text at /admin/metrics. Statements slower than SLOW_QUERY_THRESHOLD seconds
+    # are logged (None turns that off).
+    METRICS_ENABLED = os.environ.get('TRIPMATE_METRICS', '0') == '1'
+    SLOW_QUERY_THRESHOLD = 0.1  # seconds
+
+    # Chat persistence: 'sync' commits each message before it is emitted;
+    # 'batched' emits first and group-commits in the background, so a crash can
+    # lose up to CHAT_FLUSH_INTERVAL seconds of messages (see message_writer.py)
+    CHAT_WRITE_MODE = os.environ.get('CHAT_WRITE_MODE', 'sync')
+    CHAT_BATCH_SIZE = 100
+    CHAT_FLUSH_INTERVAL = 0.05  # seconds
+
+    # Most recent expenses listed on /budget (the totals always cover all of them)
+    BUDGET_ITEMS_SHOWN = 50
+
+    # Plan Smart tips feed; pages are cached per worker for TIPS_CACHE_TTL
+    # seconds, so a new tip can take that long to show up on other workers
+    TIPS_PAGE_SIZE = 20
+    TIP_MAX_LENGTH = 500
+    TIPS_CACHE_TTL = 30  # seconds
+
+    # Itinerary generator (planner.py): coordinates of known places, the cost of
+    # one visit expressed in km of travel when balancing days, the time allowed
+    # for improving a route and the number of place sets whose distance matrix
+    # is kept per worker
+    PLACE_COORDINATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                                          'place_coordinates.csv')
+    ITINERARY_STOP_COST_KM = 30.0
+    ITINERARY_OPTIMIZE_SECONDS = 0.2
+    ITINERARY_CACHE_SIZE = 128
+    ITINERARY_MAX_DAYS = 60
+    ITINERARY_MAX_STOPS = 200
+    # Calendar APIs (/api/itineraries, /api/itineraries/friends): default and
+    # largest date window, in days
+    ITINERARY_WINDOW_DAYS = 90
+    ITINERARY_MAX_WINDOW_DAYS = 366
+
+    # Friend suggestions returned per page
+    SUGGESTIONS_PAGE_SIZE = 20
+
+    # /packages pagination; the catalog version is re-checked at most this often
+    PACKAGES_PAGE_SIZE = 12
+    PACKAGES_MAX_PAGE_SIZE = 48
+    CATALOG_VERSION_TTL = 1.0  # seconds
+    # Packages upserted per transaction by the admin bulk import
+    PACKAGE_IMPORT_BATCH_SIZE = 500
+
+    # Admin booking charts, served from the booking_daily rollup: per-worker
+    # cache lifetime, default and largest date window (days), and the batch size
+    # and pause between batches of `flask rebuild-booking-stats`
+    ANALYTICS_CACHE_TTL = 60  # seconds
+    ANALYTICS_WINDOW_DAYS = 30
+    ANALYTICS_MAX_WINDOW_DAYS = 366
+    BOOKING_STATS_BATCH_SIZE = 5000
+    BOOKING_STATS_REBUILD_PAUSE = 0.05  # seconds
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    # Plain threads: no eventlet import or monkey patching under the test runner
+    SOCKETIO_ASYNC_MODE = 'threading'
+    # Leave static/dist alone; bundles are then concatenated per request
+    ASSETS_AUTO_BUILD = False
+    JINJA_BYTECODE_CACHE = False
+
+
+class ProductionConfig(Config):
+    SOCKETIO_TRANSPORTS = ['websocket']
+
+    # WAL lets readers proceed while save_dm_message/create_budget write, and
+    # synchronous=NORMAL only fsyncs at checkpoints. busy_timeout makes writers
+    # wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,             # ms
+        'cache_size': -64000,             # negative means KiB, i.e. ~64 MB
+        'mmap_size': 256 * 1024 * 1024,   # bytes
+        'temp_store': 'MEMORY',
+    }
+    # Every green thread holding a session checks out its own connection, so the
+    # pool is sized for concurrent socket handlers rather than CPU cores.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 20,
+        'max_overflow': 20,
+        'pool_timeout': 10,
+        'connect_args': {
+            'timeout': 5,                 # seconds, sqlite3's own busy handler
+            'check_same_thread': False,
+        },
+    }
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    name = name or os.environ.get('TRIPMATE_CONFIG', 'development')
+    return CONFIGS[name]
@@ -0,0 +1,8 @@
+from flask_socketio import SocketIO
+from flask_sqlalchemy import SQLAlchemy
+from flask_wtf.csrf import CSRFProtect
+
+# Created unbound here and attached to the app in create_app()
+db = SQLAlchemy()
+csrf = CSRFProtect()
+socketio = SocketIO()
@@ -0,0 +1,198 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, url_for
+
+# ------------------ Uploaded Image Pipeline ------------------
+#
+# Profile pictures and package images are stored as resized copies only: the
+# upload is size-checked and identified in the request, then a small thread pool
+# decodes it, applies the EXIF orientation, drops all metadata and writes WebP
+# and JPEG versions at every width of its kind as <key>-<width>.<ext>, where
+# <key> is a hash of the uploaded bytes. The database stores just the key, and
+# templates build srcset lists from it (templates/_images.html). Right after an
+# upload the files can take a moment to appear. If Pillow fails on an image it
+# accepted, nothing is published: the partial files are removed and templates
+# render the key as if there were no picture.
+
+log = logging.getLogger(__name__)
+
+# kind -> (config key of the folder, static/ subfolder used in URLs, widths)
+KINDS = {
+    'profile': ('PROFILE_PICS_FOLDER', 'profile_pics', (64, 128, 256)),
+    'package': ('UPLOAD_FOLDER', 'uploads', (320, 640, 1024, 1600)),
+}
+# (extension, Pillow format, extra save options)
+FORMATS = (
+    ('webp', 'WEBP', {'method': 4}),
+    ('jpg', 'JPEG', {'optimize': True, 'progressive': True}),
+)
+KEY_RE = re.compile(r'^[0-9a-f]{20}$')
+
+
+class ImageError(ValueError):
+    pass
+
+
+_pool = None
+_pending = {}
+_lock = threading.RLock()  # _done may run inside save_upload's `with _lock`
+_settings = {'max_bytes': 10 * 1024 * 1024, 'max_pixels': 40_000_000, 'quality': 80, 'workers': 2}
+
+
+def init_app(app):
+    global _pool
+    _settings.update(
+        max_bytes=app.config['IMAGE_MAX_BYTES'],
+        max_pixels=app.config['IMAGE_MAX_PIXELS'],
+        quality=app.config['IMAGE_QUALITY'],
+        workers=app.config['IMAGE_WORKERS'],
+    )
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+    app.add_template_global(image_sources)
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_settings['workers'], thread_name_prefix='images')
+        return _pool
+
+
+def save_upload(file, kind):
+    # Validates the upload and queues the resize; returns the key to store
+    folder = current_app.config[KINDS[kind][0]]
+    data = file.stream.read(_settings['max_bytes'] + 1)
+    if len(data) > _settings['max_bytes']:
+        raise ImageError(f"Images can be at most {_settings['max_bytes'] // (1024 * 1024)} MB.")
+    _check(data)
+
+    key = hashlib.sha256(data).hexdigest()[:20]
+    widths = KINDS[kind][2]
+    if all(os.path.exists(p) for p in _paths(folder, key, widths)):
+        return key
+    pool = _executor()
+    with _lock:
+        if key not in _pending:
+            future = pool.submit(_process, data, folder, key, widths)
+            _pending[key] = future
+            future.add_done_callback(lambda f: _done(key, f))
+    return key
+
+
+def _done(key, future):
+    with _lock:
+        _pending.pop(key, None)
+    error = future.exception()
+    if error is not None:
+        log.error('Could not store image %s', key, exc_info=error)
+
+
+def wait(key, timeout=None):
+    # Block until the thumbnails of `key` are written (tests, scripts)
+    with _lock:
+        future = _pending.get(key)
+    if future is not None:
+        future.result(timeout)
+
+
+def _paths(folder, key, widths):
+    return [os.path.join(folder, f"{key}-{width}.{ext}") for width in widths for ext, _, _ in FORMATS]
+
+
+def _check(data):
+    from PIL import Image  # Pillow is only imported once an image is uploaded
+
+    Image.MAX_IMAGE_PIXELS = _settings['max_pixels']
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # Header only: the format and size, without decoding the pixels
+            if img.format not in ('JPEG', 'PNG', 'GIF', 'WEBP'):
+                raise ImageError('Unsupported image format.')
+            if img.width * img.height > _settings['max_pixels']:
+                raise ImageError('Image dimensions are too large.')
+            img.verify()
+    except ImageError:
+        raise
+    except Exception:
+        raise ImageError('The file is not a valid image.')
+
+
+def _process(data, folder, key, widths):
+    os.makedirs(folder, exist_ok=True)
+    try:
+        _resize(data, folder, key, widths)
+    except Exception:
+        # Never fall back to the upload itself: it still carries its metadata
+        for path in _paths(folder, key, widths):
+            for name in (path, f"{path}.{os.getpid()}.tmp"):
+                if os.path.exists(name):
+                    os.remove(name)
+        raise
+
+
+def _resize(data, folder, key, widths):
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    for width in widths:
+        # Never upscale: widths above the original reuse the original size
+        thumb = img if width >= img.width else img.resize(
+            (width, max(1, round(img.height * width / img.width))), Image.LANCZOS
+        )
+        for ext, fmt, options in FORMATS:
+            out = thumb
+            if fmt == 'JPEG' and out.mode == 'RGBA':
+                out = Image.new('RGB', out.size, (255, 255, 255))
+                out.paste(thumb, mask=thumb.getchannel('A'))
+            out.info = {}  # no EXIF, ICC or comments in the output
+            path = os.path.join(folder, f"{key}-{width}.{ext}")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            out.save(tmp, fmt, quality=_settings['quality'], **options)
+            os.replace(tmp, path)
+
+
+def _published(kind, key):
+    # Queued here, or resized by any worker (the largest JPEG is written last);
+    # False once a resize has failed
+    with _lock:
+        if key in _pending:
+            return True
+    folder, widths = current_app.config[KINDS[kind][0]], KINDS[kind][2]
+    return os.path.exists(os.path.join(folder, f"{key}-{widths[-1]}.{FORMATS[-1][0]}"))
+
+
+def image_sources(kind, value, width=None):
+    # Template helper: {'src', 'srcset', 'webp_srcset'} for a stored image value.
+    # Older rows hold a plain filename or an absolute URL and get just a src.
+    if not value:
+        return None
+    subfolder, widths = KINDS[kind][1], KINDS[kind][2]
+    if not KEY_RE.match(value):
+        if value.startswith(('/', 'http://', 'https://')):
+            return {'src': value, 'srcset': None, 'webp_srcset': None}
+        return {'src': url_for('static', filename=f"{subfolder}/{value}"), 'srcset': None, 'webp_srcset': None}
+
+    if not _published(kind, value):
+        return None
+
+    def url(w, ext):
+        return url_for('static', filename=f"{subfolder}/{value}-{w}.{ext}")
+
+    default = width if width in widths else widths[len(widths) // 2]
+    return {
+        'src': url(default, 'jpg'),
+        'srcset': ', '.join(f"{url(w, 'jpg')} {w}w" for w in widths),
+        'webp_srcset': ', '.join(f"{url(w, 'webp')} {w}w" for w in widths),
+    }
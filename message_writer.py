@@ -0,0 +1,114 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+import metrics
+
+# ------------------ Write-Behind Chat Persistence ------------------
+#
+# In CHAT_WRITE_MODE = 'batched', send_message emits right away and hands the row
+# to a MessageWriter. A background thread drains the queue and writes up to
+# CHAT_BATCH_SIZE rows per transaction, waiting at most CHAT_FLUSH_INTERVAL
+# seconds for a batch to fill. One commit (and fsync) then covers many messages.
+#
+# Durability: a message is acknowledged before it is on disk, so a crash can lose
+# the last CHAT_FLUSH_INTERVAL seconds of chat. Clean shutdowns flush everything
+# (atexit). Use 'sync' to commit every message before it is emitted. A batch whose
+# commit fails is retried once, then written row by row; only rows that still
+# fail are dropped, logged and counted (tripmate_chat_messages_dropped_total).
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MessageWriter:
+
+    def __init__(self, app, persist, batch_size=100, flush_interval=0.05):
+        # `persist(rows)` writes a list of message dicts in one transaction
+        self.app = app
+        self.persist = persist
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='message-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def submit(self, row):
+        if self._thread is None:
+            self.start()
+        self._queue.put(row)
+
+    def flush(self, timeout=None):
+        # Block until everything submitted so far has been written
+        done = threading.Event()
+        self.submit(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout=10):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                batch, waiters, stop = self._collect()
+                if batch:
+                    self._write(batch)
+                for event in waiters:
+                    event.set()
+                if stop:
+                    return
+
+    def _collect(self):
+        # Wait for one item, then take whatever else arrives within flush_interval
+        batch, waiters = [], []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                return batch, waiters, True
+            if isinstance(item, threading.Event):
+                # flush(): everything submitted before it is in this batch or already written
+                waiters.append(item)
+                return batch, waiters, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, waiters, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, waiters, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, waiters, False
+
+    def _write(self, batch):
+        # `persist` rolls its transaction back before raising
+        for attempt in range(2):
+            try:
+                self.persist(batch)
+                return
+            except Exception:
+                log.warning('Writing %d chat messages failed (attempt %d)', len(batch), attempt + 1,
+                            exc_info=True)
+        dropped = 0
+        for row in batch:
+            try:
+                self.persist([row])
+            except Exception:
+                dropped += 1
+                log.exception('Dropped chat message from %s to %s', row.get('sender_id'), row.get('receiver_id'))
+        if dropped:
+            metrics.registry.messages_dropped(dropped)
+
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+# ------------------ Request / Socket Event Instrumentation ------------------
+#
+# Opt-in with METRICS_ENABLED. For every route (by endpoint) and every
+# instrumented Socket.IO handler it records call count, SQL statement count,
+# SQL time, template render time and wall time, via SQLAlchemy engine events
+# and Flask request hooks. Queries slower than SLOW_QUERY_THRESHOLD seconds are
+# logged. Totals are per process; /admin/metrics serves them as Prometheus text.
+
+log = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the wall time histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Sample:
+    # Costs accumulated by one request or socket event
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self._render_started = None
+
+
+class Registry:
+
+    def __init__(self):
+        self._stats = {}
+        self._slow_queries = 0
+        self._dropped_messages = 0
+        self._lock = threading.Lock()
+
+    def record(self, sample):
+        wall = time.perf_counter() - sample.started
+        key = (sample.kind, sample.name)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    'count': 0, 'statements': 0, 'sql': 0.0, 'render': 0.0, 'wall': 0.0,
+                    'buckets': [0] * len(BUCKETS),
+                }
+            stats['count'] += 1
+            stats['statements'] += sample.statements
+            stats['sql'] += sample.sql_seconds
+            stats['render'] += sample.render_seconds
+            stats['wall'] += wall
+            for i, bound in enumerate(BUCKETS):
+                if wall <= bound:
+                    stats['buckets'][i] += 1
+
+    def slow_query(self):
+        with self._lock:
+            self._slow_queries += 1
+
+    def messages_dropped(self, count):
+        # Chat messages the batched writer could not store (message_writer.py)
+        with self._lock:
+            self._dropped_messages += count
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries = 0
+            self._dropped_messages = 0
+
+    def snapshot(self):
+        with self._lock:
+            stats = {key: dict(value, buckets=list(value['buckets'])) for key, value in self._stats.items()}
+            return stats, self._slow_queries, self._dropped_messages
+
+    def prometheus(self):
+        stats, slow_queries, dropped_messages = self.snapshot()
+        lines = []
+        counters = [
+            ('tripmate_calls_total', 'Requests or socket events handled', 'count'),
+            ('tripmate_sql_statements_total', 'SQL statements executed', 'statements'),
+            ('tripmate_sql_seconds_total', 'Time spent executing SQL', 'sql'),
+            ('tripmate_render_seconds_total', 'Time spent rendering templates', 'render'),
+        ]
+        for metric, help_text, field in counters:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for (kind, name), s in sorted(stats.items()):
+                lines.append(f"{metric}{{{_labels(kind, name)}}} {s[field]}")
+
+        metric = 'tripmate_wall_seconds'
+        lines += [f"# HELP {metric} Wall time per request or socket event", f"# TYPE {metric} histogram"]
+        for (kind, name), s in sorted(stats.items()):
+            labels = _labels(kind, name)
+            for bound, count in zip(BUCKETS, s['buckets']):
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f"{metric}_sum{{{labels}}} {s['wall']}")
+            lines.append(f"{metric}_count{{{labels}}} {s['count']}")
+
+        metric = 'tripmate_slow_queries_total'
+        lines += [f"# HELP {metric} SQL statements slower than SLOW_QUERY_THRESHOLD",
+                  f"# TYPE {metric} counter", f"{metric} {slow_queries}"]
+
+        metric = 'tripmate_chat_messages_dropped_total'
+        lines += [f"# HELP {metric} Chat messages the batched writer failed to store",
+                  f"# TYPE {metric} counter", f"{metric} {dropped_messages}"]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(kind, name):
+    return f'kind="{_escape(kind)}",endpoint="{_escape(name)}"'
+
+
+registry = Registry()
+
+
+def _current_sample():
+    if has_app_context():
+        return g.get('_metrics_sample')
+    return None
+
+
+# ------------------ Hooks ------------------
+
+def init_app(app, engine):
+    if not app.config['METRICS_ENABLED']:
+        return
+    threshold = app.config['SLOW_QUERY_THRESHOLD']
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_metrics_started'].pop()
+        sample = _current_sample()
+        if sample is not None:
+            sample.statements += 1
+            sample.sql_seconds += elapsed
+        if threshold is not None and elapsed >= threshold:
+            registry.slow_query()
+            log.warning('Slow query (%.1f ms, %s): %s', elapsed * 1000,
+                        sample.name if sample is not None else '-',
+                        ' '.join(statement.split())[:500])
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.before_request
+    def start_request_sample():
+        g._metrics_sample = Sample('http', request.endpoint or 'unmatched')
+
+    @app.teardown_request
+    def record_request_sample(exc):
+        sample = g.pop('_metrics_sample', None)
+        if sample is not None:
+            registry.record(sample)
+
+    def render_started(sender, template, context, **extra):
+        sample = _current_sample()
+        if sample is not None:
+            sample._render_started = time.perf_counter()
+
+    def render_finished(sender, template, context, **extra):
+        sample = _current_sample()
+        if sample is not None and sample._render_started is not None:
+            sample.render_seconds += time.perf_counter() - sample._render_started
+            sample._render_started = None
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+
+def socket_event(f):
+    # Put under @socketio.on(...) to record the handler like a route
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.config['METRICS_ENABLED']:
+            return f(*args, **kwargs)
+        outer = g.get('_metrics_sample')
+        g._metrics_sample = sample = Sample('socketio', f.__name__)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g._metrics_sample = outer
+            registry.record(sample)
+    return decorated_function
@@ -0,0 +1,358 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+import analytics
+import catalog
+
+# ------------------ Versioned Schema Migrations ------------------
+#
+# db.create_all() only creates missing tables, so indexes and constraints added to
+# the models later never reach an existing tripmate.db. Each migration below is a
+# list of steps applied once, in order; the applied version is tracked in SQLite's
+# PRAGMA user_version. A step is either a SQL string or a callable taking the
+# connection. Steps use IF NOT EXISTS so that running them against a fresh
+# database created by create_all() is harmless.
+
+def add_column(table, column, ddl):
+    # ALTER TABLE has no IF NOT EXISTS; skip columns create_all() already made
+    def step(conn):
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+# Formats accepted for itinerary dates saved before they became DATE columns
+LEGACY_DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y')
+
+
+def _legacy_date(value):
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime((value or '').strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def copy_itinerary_dates(conn):
+    # Migration step: itinerary -> itinerary_new with ISO dates; values that are
+    # not a date become NULL and reversed ranges are swapped
+    rows = conn.execute(text("SELECT id, user_id, destination, start_date, end_date, plan FROM itinerary")).all()
+    params = []
+    for row in rows:
+        start, end = _legacy_date(row.start_date), _legacy_date(row.end_date)
+        if start and end and end < start:
+            start, end = end, start
+        params.append({'id': row.id, 'user_id': row.user_id, 'destination': row.destination,
+                       'start': start, 'end': end, 'plan': row.plan})
+    if params:
+        conn.execute(
+            text("INSERT INTO itinerary_new (id, user_id, destination, start_date, end_date, plan)"
+                 " VALUES (:id, :user_id, :destination, :start, :end, :plan)"),
+            params,
+        )
+
+
+def rebuild_friend_without_inline_unique(conn):
+    # Migration step: databases made by create_all() while the model declared a
+    # UNIQUE constraint carry sqlite_autoindex_friend_1 next to uq_friend_user_friend.
+    # An automatic index cannot be dropped, so the table is rebuilt without it.
+    indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(friend)"))}
+    if not any(name.startswith('sqlite_autoindex_friend') for name in indexes):
+        return
+    for sql in (
+        "DROP TABLE IF EXISTS friend_new",
+        "CREATE TABLE friend_new ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " user_id INTEGER NOT NULL REFERENCES user (id),"
+        " friend_id INTEGER NOT NULL REFERENCES user (id),"
+        " status VARCHAR(20))",
+        "INSERT INTO friend_new (id, user_id, friend_id, status)"
+        " SELECT id, user_id, friend_id, status FROM friend",
+        "DROP TABLE friend",
+        "ALTER TABLE friend_new RENAME TO friend",
+        "CREATE UNIQUE INDEX uq_friend_user_friend ON friend (user_id, friend_id)",
+        "CREATE INDEX ix_friend_user_status ON friend (user_id, status, friend_id)",
+        "CREATE INDEX ix_friend_friend_status ON friend (friend_id, status, user_id)",
+    ):
+        conn.execute(text(sql))
+
+
+MIGRATIONS = [
+    (1, 'message conversation index', [
+        "CREATE INDEX IF NOT EXISTS ix_message_conversation "
+        "ON message (min(sender_id, receiver_id), max(sender_id, receiver_id), id)",
+    ]),
+    (2, 'foreign key and lookup indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_budget_user_id ON budget (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_booking_user_package ON booking (user_id, package_id)",
+        "CREATE INDEX IF NOT EXISTS ix_booking_package_id ON booking (package_id)",
+        "CREATE INDEX IF NOT EXISTS ix_itinerary_user_id ON itinerary (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_friend_user_status ON friend (user_id, status, friend_id)",
+        "CREATE INDEX IF NOT EXISTS ix_friend_friend_status ON friend (friend_id, status, user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_message_sender_id ON message (sender_id)",
+        "CREATE INDEX IF NOT EXISTS ix_message_receiver_id ON message (receiver_id)",
+        "CREATE INDEX IF NOT EXISTS ix_message_timestamp ON message (timestamp)",
+    ]),
+    (3, 'unique friend pairs', [
+        # Keep one row per (user_id, friend_id), preferring an accepted one
+        "DELETE FROM friend WHERE id NOT IN ("
+        " SELECT COALESCE(MIN(CASE WHEN status = 'accepted' THEN id END), MIN(id))"
+        " FROM friend GROUP BY user_id, friend_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_friend_user_friend ON friend (user_id, friend_id)",
+    ]),
+    (4, 'normalized package places and hotels', [
+        "CREATE TABLE IF NOT EXISTS place ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " name VARCHAR(200) COLLATE NOCASE NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS hotel ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " name VARCHAR(200) COLLATE NOCASE NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS package_place ("
+        " package_id INTEGER NOT NULL REFERENCES package (id),"
+        " place_id INTEGER NOT NULL REFERENCES place (id),"
+        " position INTEGER NOT NULL,"
+        " PRIMARY KEY (package_id, place_id))",
+        "CREATE TABLE IF NOT EXISTS package_hotel ("
+        " package_id INTEGER NOT NULL REFERENCES package (id),"
+        " hotel_id INTEGER NOT NULL REFERENCES hotel (id),"
+        " position INTEGER NOT NULL,"
+        " PRIMARY KEY (package_id, hotel_id))",
+        "CREATE INDEX IF NOT EXISTS ix_package_place_place ON package_place (place_id, package_id)",
+        "CREATE INDEX IF NOT EXISTS ix_package_hotel_hotel ON package_hotel (hotel_id, package_id)",
+        "CREATE INDEX IF NOT EXISTS ix_package_price ON package (price)",
+        "CREATE INDEX IF NOT EXISTS ix_package_total_days ON package (total_days)",
+        catalog.backfill_package_links,
+    ]),
+    (5, 'package full-text index', [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS package_fts USING fts5("
+        " title, description, places, hotels,"
+        " content='package', content_rowid='id',"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        *catalog.FTS_TRIGGERS,
+        "INSERT INTO package_fts (package_fts) VALUES ('rebuild')",
+    ]),
+    (6, 'catalog version for listing caches', [
+        "CREATE TABLE IF NOT EXISTS catalog_state ("
+        " id INTEGER NOT NULL PRIMARY KEY CHECK (id = 1),"
+        " version INTEGER NOT NULL,"
+        " updated_at INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO catalog_state (id, version, updated_at)"
+        " VALUES (1, 1, CAST(strftime('%s', 'now') AS INTEGER))",
+        *catalog.VERSION_TRIGGERS,
+    ]),
+    (7, 'conversation summaries', [
+        "CREATE TABLE IF NOT EXISTS conversation ("
+        " user_low INTEGER NOT NULL REFERENCES user (id),"
+        " user_high INTEGER NOT NULL REFERENCES user (id),"
+        " last_message_id INTEGER NOT NULL,"
+        " last_sender_id INTEGER NOT NULL,"
+        " last_timestamp DATETIME,"
+        " unread_low INTEGER NOT NULL,"
+        " unread_high INTEGER NOT NULL,"
+        " PRIMARY KEY (user_low, user_high))",
+        "CREATE INDEX IF NOT EXISTS ix_conversation_low_recent ON conversation (user_low, last_message_id)",
+        "CREATE INDEX IF NOT EXISTS ix_conversation_high_recent ON conversation (user_high, last_message_id)",
+        # Existing history starts out as read
+        "INSERT OR IGNORE INTO conversation"
+        " (user_low, user_high, last_message_id, last_sender_id, last_timestamp, unread_low, unread_high)"
+        " SELECT min(sender_id, receiver_id), max(sender_id, receiver_id), id, sender_id, timestamp, 0, 0"
+        " FROM message WHERE id IN ("
+        "  SELECT max(id) FROM message"
+        "  GROUP BY min(sender_id, receiver_id), max(sender_id, receiver_id))",
+    ]),
+    (8, 'persistent tips', [
+        "CREATE TABLE IF NOT EXISTS tip ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " user_id INTEGER NOT NULL REFERENCES user (id),"
+        " content TEXT NOT NULL,"
+        " content_hash VARCHAR(64) NOT NULL UNIQUE,"
+        " created_at DATETIME DEFAULT (CURRENT_TIMESTAMP))",
+        "CREATE INDEX IF NOT EXISTS ix_tip_user_id ON tip (user_id)",
+    ]),
+    (9, 'persisted trip budget and expense categories', [
+        add_column('user', 'total_budget', 'FLOAT'),
+        add_column('budget', 'category', "VARCHAR(30) NOT NULL DEFAULT 'other'"),
+        add_column('budget', 'itinerary_id', 'INTEGER REFERENCES itinerary (id)'),
+        "CREATE INDEX IF NOT EXISTS ix_budget_itinerary_id ON budget (itinerary_id)",
+    ]),
+    (10, 'generated itinerary plans', [
+        add_column('itinerary', 'plan', 'TEXT'),
+    ]),
+    (11, 'typed itinerary dates', [
+        # SQLite cannot change a column type: rebuild the table. Deferred so that
+        # budget.itinerary_id stays valid when foreign keys are enforced.
+        "PRAGMA defer_foreign_keys = ON",
+        "DROP TABLE IF EXISTS itinerary_new",
+        "CREATE TABLE itinerary_new ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " user_id INTEGER NOT NULL REFERENCES user (id),"
+        " destination VARCHAR(200) NOT NULL,"
+        " start_date DATE,"
+        " end_date DATE,"
+        " plan TEXT,"
+        " CONSTRAINT ck_itinerary_dates CHECK (end_date >= start_date))",
+        copy_itinerary_dates,
+        "DROP TABLE itinerary",
+        "ALTER TABLE itinerary_new RENAME TO itinerary",
+        "CREATE INDEX IF NOT EXISTS ix_itinerary_user_dates ON itinerary (user_id, start_date, end_date)",
+    ]),
+    (12, 'daily booking rollup', [
+        "CREATE TABLE IF NOT EXISTS booking_daily ("
+        " package_id INTEGER NOT NULL,"
+        " day DATE NOT NULL,"
+        " bookings INTEGER NOT NULL,"
+        " revenue FLOAT NOT NULL,"
+        " PRIMARY KEY (package_id, day)) WITHOUT ROWID",
+        # All packages over a date range, without touching the table
+        "CREATE INDEX IF NOT EXISTS ix_booking_daily_day ON booking_daily (day, package_id, bookings, revenue)",
+    ]),
+    (13, 'price paid per booking', [
+        add_column('booking', 'price', 'FLOAT'),
+        # Older bookings did not record it; the current package price is the best guess
+        "UPDATE booking SET price = (SELECT price FROM package WHERE package.id = booking.package_id)"
+        " WHERE price IS NULL",
+        "CREATE TABLE IF NOT EXISTS booking_daily_rebuild ("
+        " done_up_to INTEGER NOT NULL,"
+        " last_id INTEGER NOT NULL)",
+        "DROP TRIGGER IF EXISTS booking_daily_insert",
+        "DROP TRIGGER IF EXISTS booking_daily_delete",
+        *analytics.ROLLUP_TRIGGERS,
+        "DELETE FROM booking_daily",
+        analytics.backfill_booking_daily,
+    ]),
+    (14, 'single unique index on friend pairs', [
+        rebuild_friend_without_inline_unique,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def upgrade(engine, target=LATEST_VERSION):
+    # Apply pending migrations, each in its own transaction. Returns the versions applied.
+    applied = []
+    with engine.connect() as conn:
+        version = current_version(conn)
+    for number, name, statements in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        with engine.begin() as conn:
+            for step in statements:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(text(f"PRAGMA user_version = {int(number)}"))
+        print(f"Applied migration {number}: {name}")
+        applied.append(number)
+    return applied
+
+
+# ------------------ Query Plan Checks ------------------
+
+# The hot per-user queries issued by the data helpers in app.py, with the index
+# each one is expected to use.
+HOT_QUERIES = [
+    ('fetch_budget', "SELECT name, amount FROM budget WHERE user_id = :uid",
+     'ix_budget_user_id'),
+    ('fetch_user_bookings',
+     "SELECT package.title FROM booking JOIN package ON booking.package_id = package.id "
+     "WHERE booking.user_id = :uid",
+     'ix_booking_user_package'),
+    ('bookings per package', "SELECT count(*) FROM booking WHERE package_id = :pid",
+     'ix_booking_package_id'),
+    ('itineraries of a user', "SELECT * FROM itinerary WHERE user_id = :uid",
+     'ix_itinerary_user_dates'),
+    ('trips overlapping a window',
+     "SELECT id FROM itinerary WHERE user_id = :uid AND start_date <= :hi_date AND end_date >= :lo_date",
+     'ix_itinerary_user_dates'),
+    ('friends travelling at the same time',
+     "SELECT theirs.id FROM itinerary AS mine JOIN itinerary AS theirs"
+     " ON theirs.start_date <= mine.end_date AND theirs.end_date >= mine.start_date"
+     " WHERE mine.user_id = :uid AND theirs.user_id IN (SELECT friend_id FROM friend"
+     " WHERE user_id = :uid AND status = 'accepted')",
+     'ix_itinerary_user_dates'),
+    ('get_friends (outgoing)',
+     "SELECT friend_id FROM friend WHERE user_id = :uid AND status = 'accepted'",
+     'ix_friend_user_status'),
+    ('get_friend_requests',
+     "SELECT user_id FROM friend WHERE friend_id = :uid AND status = 'pending'",
+     'ix_friend_friend_status'),
+    ('suggested friends (edges leaving my friends)',
+     "SELECT user_id, friend_id FROM friend WHERE user_id IN (:uid, :fid) AND status = 'accepted'",
+     'ix_friend_user_status'),
+    ('suggested friends (edges reaching my friends)',
+     "SELECT friend_id, user_id FROM friend WHERE friend_id IN (:uid, :fid) AND status = 'accepted'",
+     'ix_friend_friend_status'),
+    ('add_friend duplicate check',
+     "SELECT id FROM friend WHERE user_id = :uid AND friend_id = :fid",
+     'uq_friend_user_friend'),
+    ('get_dm_messages',
+     "SELECT * FROM message WHERE min(sender_id, receiver_id) = :low "
+     "AND max(sender_id, receiver_id) = :high AND id < :before ORDER BY id DESC LIMIT 50",
+     'ix_message_conversation'),
+    ('inbox (as lower id)',
+     "SELECT user_high FROM conversation WHERE user_low = :uid ORDER BY last_message_id DESC",
+     'ix_conversation_low_recent'),
+    ('inbox (as higher id)',
+     "SELECT user_low FROM conversation WHERE user_high = :uid ORDER BY last_message_id DESC",
+     'ix_conversation_high_recent'),
+    ('messages sent by a user', "SELECT id FROM message WHERE sender_id = :uid",
+     'ix_message_sender_id'),
+    ('messages received by a user', "SELECT id FROM message WHERE receiver_id = :uid",
+     'ix_message_receiver_id'),
+    ('recent messages', "SELECT id FROM message WHERE timestamp > :ts",
+     'ix_message_timestamp'),
+    ('packages visiting a place',
+     "SELECT package_place.package_id FROM package_place JOIN place ON place.id = package_place.place_id "
+     "WHERE place.name = :name",
+     'ix_package_place_place'),
+    ('packages with a hotel',
+     "SELECT package_hotel.package_id FROM package_hotel JOIN hotel ON hotel.id = package_hotel.hotel_id "
+     "WHERE hotel.name = :name",
+     'ix_package_hotel_hotel'),
+    ('packages in a price range', "SELECT id FROM package WHERE price BETWEEN :lo AND :hi",
+     'ix_package_price'),
+    ('daily bookings (all packages)',
+     "SELECT day, SUM(bookings), SUM(revenue) FROM booking_daily WHERE day BETWEEN :lo_date AND :hi_date GROUP BY day",
+     'ix_booking_daily_day'),
+    ('daily bookings of a package',
+     "SELECT day, bookings, revenue FROM booking_daily WHERE package_id = :pid AND day BETWEEN :lo_date AND :hi_date",
+     'PRIMARY KEY'),
+    ('packages by day count', "SELECT id FROM package WHERE total_days = :days",
+     'ix_package_total_days'),
+]
+
+SAMPLE_PARAMS = {'uid': 1, 'fid': 2, 'pid': 1, 'low': 1, 'high': 2, 'before': 100,
+                 'ts': '2025-01-01 00:00:00', 'name': 'Baga Beach', 'lo': 10000, 'hi': 20000,
+                 'days': 4, 'lo_date': '2026-01-01', 'hi_date': '2026-01-31'}
+
+
+def explain(conn, sql, params=None):
+    rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params or SAMPLE_PARAMS).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(engine, queries=HOT_QUERIES):
+    # Returns a list of (name, plan) for every query that does not use its index
+    failures = []
+    with engine.connect() as conn:
+        for name, sql, index in queries:
+            plan = explain(conn, sql)
+            if not any(index in detail for detail in plan):
+                failures.append((name, plan))
+    return failures
+
+
+def assert_query_plans(engine, queries=HOT_QUERIES):
+    failures = check_query_plans(engine, queries)
+    assert not failures, "Queries not using their index: " + "; ".join(
+        f"{name}: {' | '.join(plan)}" for name, plan in failures
+    )
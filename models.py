@@ -0,0 +1,160 @@
+from sqlalchemy.sql import func
+
+from extensions import db
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    role = db.Column(db.String(20), default='user')
+    name = db.Column(db.String(120))
+    phone = db.Column(db.String(30))
+    profile_pic = db.Column(db.String(255))
+    emergency_contact = db.Column(db.String(120))
+    # Trip budget entered on /budget
+    total_budget = db.Column(db.Float)
+
+
+package_place = db.Table(
+    'package_place',
+    db.Column('package_id', db.Integer, db.ForeignKey('package.id'), primary_key=True),
+    db.Column('place_id', db.Integer, db.ForeignKey('place.id'), primary_key=True),
+    db.Column('position', db.Integer, nullable=False),
+    db.Index('ix_package_place_place', 'place_id', 'package_id'),
+)
+
+package_hotel = db.Table(
+    'package_hotel',
+    db.Column('package_id', db.Integer, db.ForeignKey('package.id'), primary_key=True),
+    db.Column('hotel_id', db.Integer, db.ForeignKey('hotel.id'), primary_key=True),
+    db.Column('position', db.Integer, nullable=False),
+    db.Index('ix_package_hotel_hotel', 'hotel_id', 'package_id'),
+)
+
+
+class Place(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200, collation='NOCASE'), unique=True, nullable=False)
+
+
+class Hotel(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200, collation='NOCASE'), unique=True, nullable=False)
+
+
+class Package(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    price = db.Column(db.Float, index=True)
+    total_days = db.Column(db.Integer, index=True)
+    image_path = db.Column(db.String(255))
+    # Comma-joined display copies; package_place/package_hotel are the indexed source
+    places = db.Column(db.Text)
+    hotels = db.Column(db.Text)
+
+    place_list = db.relationship(
+        Place, secondary=package_place, order_by=package_place.c.position, viewonly=True)
+    hotel_list = db.relationship(
+        Hotel, secondary=package_hotel, order_by=package_hotel.c.position, viewonly=True)
+
+
+class Budget(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(120), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(30), nullable=False, default='other', server_default='other')
+    itinerary_id = db.Column(db.Integer, db.ForeignKey('itinerary.id'), index=True)
+
+
+class Booking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    package_id = db.Column(db.Integer, db.ForeignKey('package.id'), nullable=False, index=True)
+    price = db.Column(db.Float)  # package price when booked
+    created_at = db.Column(db.DateTime, server_default=func.now())
+
+    __table_args__ = (
+        # Covers "bookings of a user" including the join column
+        db.Index('ix_booking_user_package', 'user_id', 'package_id'),
+    )
+
+
+class Itinerary(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    destination = db.Column(db.String(200), nullable=False)
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    # Generated day-by-day plan as JSON (planner.plan_trip)
+    plan = db.Column(db.Text)
+
+    __table_args__ = (
+        db.CheckConstraint('end_date >= start_date', name='ck_itinerary_dates'),
+        # Interval lookups per user: start_date <= :end AND end_date >= :start
+        db.Index('ix_itinerary_user_dates', 'user_id', 'start_date', 'end_date'),
+    )
+
+
+class Friend(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    friend_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending/accepted
+
+    __table_args__ = (
+        # An index rather than a UNIQUE constraint, as migration 3 creates it: a
+        # constraint would add a second, automatic index on the same columns
+        db.Index('uq_friend_user_friend', 'user_id', 'friend_id', unique=True),
+        # Covering indexes for accepted/pending lookups in either direction
+        db.Index('ix_friend_user_status', 'user_id', 'status', 'friend_id'),
+        db.Index('ix_friend_friend_status', 'friend_id', 'status', 'user_id'),
+    )
+
+
+class Message(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    message = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, server_default=func.now(), index=True)
+
+    # Conversation key is (min(user), max(user)) so both directions share one index range
+    __table_args__ = (
+        db.Index(
+            'ix_message_conversation',
+            func.min(sender_id, receiver_id),
+            func.max(sender_id, receiver_id),
+            id,
+        ),
+    )
+
+
+class Conversation(db.Model):
+    # One row per DM pair (user_low < user_high), kept up to date by
+    # persist_messages so the inbox never has to scan the message table
+    user_low = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    user_high = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_message_id = db.Column(db.Integer, nullable=False)
+    last_sender_id = db.Column(db.Integer, nullable=False)
+    last_timestamp = db.Column(db.DateTime)
+    # Messages not yet read by user_low / user_high
+    unread_low = db.Column(db.Integer, nullable=False, default=0)
+    unread_high = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_conversation_high_recent', 'user_high', 'last_message_id'),
+        db.Index('ix_conversation_low_recent', 'user_low', 'last_message_id'),
+    )
+
+
+class Tip(db.Model):
+    # Plan Smart tips, newest first by id
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    content = db.Column(db.Text, nullable=False)
+    # sha256 of the normalized content, so the same tip is only stored once
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, server_default=func.now())
@@ -0,0 +1,224 @@
+import csv
+import io
+import json
+import math
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import catalog
+from models import Package
+
+# ------------------ Bulk Package Import / Export ------------------
+#
+# Uploads are read one row at a time (CSV with a header row, or JSON Lines),
+# validated, and upserted by title in batches: one INSERT ... ON CONFLICT per
+# batch plus the place/hotel links, committed together. A row replaces the whole
+# package, so columns left empty are cleared. The FTS index and the
+# catalog version follow through their triggers. Exports page through the table
+# by id and yield one line at a time.
+
+FIELDS = ('title', 'description', 'price', 'total_days', 'image_path', 'places', 'hotels')
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    # .json is not accepted: a JSON array cannot be read row by row
+    ext = (filename or '').rsplit('.', 1)[-1].lower()
+    if ext == 'csv':
+        return 'csv'
+    if ext in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+
+def _decoded_lines(stream, position):
+    # Lines of the binary upload as text. Lines that are not UTF-8 are left out
+    # and their numbers queued in position['bad'] for read_rows to report.
+    for number, raw in enumerate(stream, 1):
+        position['line'] = number
+        try:
+            yield raw.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            position['bad'].append(number)
+
+
+def read_rows(stream, fmt):
+    # Yields (line number, raw dict). Lines that are not UTF-8, invalid JSON and
+    # CSV records the csv module cannot parse are yielded as RowError; reading
+    # goes on with the next line.
+    position = {'line': 0, 'bad': []}
+    lines = _decoded_lines(stream, position)
+
+    def undecodable():
+        while position['bad']:
+            yield position['bad'].pop(0), RowError('not UTF-8 text (save the file as UTF-8)')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                row = RowError(f"unreadable CSV: {e}")
+            yield from undecodable()
+            yield position['line'], row
+        yield from undecodable()
+        return
+    for line in lines:
+        yield from undecodable()
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield position['line'], RowError(f"invalid JSON: {e}")
+            continue
+        yield position['line'], row if isinstance(row, dict) else RowError('expected a JSON object')
+    yield from undecodable()
+
+
+def _names(value):
+    if isinstance(value, (list, tuple)):
+        return catalog.clean_names(str(v) for v in value)
+    return catalog.split_names(str(value) if value is not None else '')
+
+
+def _number(row, field, kind, minimum):
+    value = row.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = kind(value)
+        finite = math.isfinite(number)
+    except (TypeError, ValueError, OverflowError):
+        raise RowError(f"{field} must be a number")
+    if not finite:  # nan, inf, or a float literal such as 1e999
+        raise RowError(f"{field} must be a finite number")
+    if number < minimum:
+        raise RowError(f"{field} must be at least {minimum}")
+    return number
+
+
+def validate_row(row):
+    # Returns the column values for Package, or raises RowError
+    if isinstance(row, RowError):
+        raise row
+    title = str(row.get('title') or '').strip()
+    if not title:
+        raise RowError('title is required')
+    if len(title) > 200:
+        raise RowError('title is longer than 200 characters')
+    places, hotels = _names(row.get('places')), _names(row.get('hotels'))
+    return {
+        'title': title,
+        'description': (str(row.get('description') or '').strip() or None),
+        'price': _number(row, 'price', float, 0),
+        'total_days': _number(row, 'total_days', int, 1),
+        'image_path': (str(row.get('image_path') or '').strip() or None),
+        'places': ",".join(places),
+        'hotels': ",".join(hotels),
+    }
+
+
+def upsert_batch(conn, rows):
+    # rows: validated dicts, unique by title. Returns the number of new packages.
+    titles = [row['title'] for row in rows]
+    existing = set(conn.scalars(select(Package.title).where(Package.title.in_(titles))))
+    stmt = sqlite_insert(Package)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Package.title],
+        set_={field: stmt.excluded[field] for field in FIELDS if field != 'title'},
+    )
+    conn.execute(stmt, rows)
+    ids = dict(conn.execute(select(Package.title, Package.id).where(Package.title.in_(titles))).all())
+    for row in rows:
+        catalog.replace_package_links(conn, ids[row['title']], catalog.split_names(row['places']),
+                                      catalog.split_names(row['hotels']))
+    return len(set(titles) - existing)
+
+
+def import_rows(session, rows, batch_size=500, max_errors=100):
+    # rows: iterable of (line number, raw row). Each batch commits on its own; a
+    # batch the database rejects is reported by line range and the import goes on.
+    report = {'inserted': 0, 'updated': 0, 'rejected': 0, 'batches': 0, 'errors': []}
+    batch = {}
+    lines = []
+
+    def reject(line, error):
+        report['rejected'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'line': line, 'error': error})
+
+    def flush():
+        if not batch:
+            return
+        try:
+            inserted = upsert_batch(session, list(batch.values()))
+            session.commit()
+        except SQLAlchemyError as e:
+            # Earlier batches stay committed; report this one's lines and go on
+            session.rollback()
+            report['rejected'] += len(lines) - 1
+            reject(f"{lines[0]}-{lines[-1]}", f"batch not saved: {getattr(e, 'orig', None) or e}")
+        else:
+            # Rows repeating a title within the batch count as updates
+            report['inserted'] += inserted
+            report['updated'] += len(lines) - inserted
+            report['batches'] += 1
+        batch.clear()
+        lines.clear()
+
+    for line_no, raw in rows:
+        try:
+            row = validate_row(raw)
+        except RowError as e:
+            reject(line_no, str(e))
+            continue
+        # A repeated title within a batch: the later row wins, as it would across batches
+        batch[row['title']] = row
+        lines.append(line_no)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
+
+
+def export_rows(conn, fmt, chunk_size=500):
+    # Generator of encoded lines, reading the table in id order chunk by chunk
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def encode(values):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(values)
+            return buffer.getvalue()
+
+        yield encode(FIELDS)
+    else:
+        def encode(values):
+            row = dict(zip(FIELDS, values))
+            row['places'] = catalog.split_names(row['places'])
+            row['hotels'] = catalog.split_names(row['hotels'])
+            return json.dumps(row, ensure_ascii=False) + '\n'
+
+    columns = [getattr(Package, field) for field in FIELDS]
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Package.id, *columns).where(Package.id > last_id).order_by(Package.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            yield encode(row[1:])
+        last_id = rows[-1][0]
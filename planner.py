@@ -0,0 +1,263 @@
+import csv
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+# ------------------ Day-by-Day Itinerary Planning ------------------
+#
+# Stops are looked up in a local coordinates file (data/place_coordinates.csv)
+# or given with their own position as "Name @ lat, lon". The pairwise distance
+# matrix of a set of stops is computed once and cached by the set; the route is a
+# nearest-neighbour tour from the first stop improved with 2-opt moves until no
+# move helps or ITINERARY_OPTIMIZE_SECONDS run out. The route is then cut into
+# consecutive days so that the busiest day (travel plus a fixed cost per visit)
+# is as light as possible.
+
+EARTH_RADIUS_KM = 6371.0
+
+_settings = {'coordinates_file': None, 'stop_cost_km': 30.0, 'optimize_seconds': 0.2}
+_coordinates = None
+_coordinates_lock = threading.Lock()
+
+
+class MatrixCache:
+    # LRU of place set -> {'stops', 'matrix', 'routes'}; routes are memoised per start
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+matrix_cache = MatrixCache()
+
+
+def init_app(app):
+    global _coordinates
+    _settings.update(
+        coordinates_file=app.config['PLACE_COORDINATES_FILE'],
+        stop_cost_km=app.config['ITINERARY_STOP_COST_KM'],
+        optimize_seconds=app.config['ITINERARY_OPTIMIZE_SECONDS'],
+    )
+    matrix_cache.maxsize = app.config['ITINERARY_CACHE_SIZE']
+    matrix_cache.clear()
+    with _coordinates_lock:
+        _coordinates = None
+
+
+def coordinates():
+    # lower-cased name -> (name, latitude, longitude), read once per process
+    global _coordinates
+    if _coordinates is None:
+        with _coordinates_lock:
+            if _coordinates is None:
+                table = {}
+                path = _settings['coordinates_file']
+                if path:
+                    with open(path, newline='', encoding='utf-8') as f:
+                        for row in csv.DictReader(f):
+                            table[row['name'].strip().lower()] = (
+                                row['name'].strip(), float(row['latitude']), float(row['longitude'])
+                            )
+                _coordinates = table
+    return _coordinates
+
+
+def locate(stops):
+    # stops: place names, or "Name @ lat, lon" for places missing from the
+    # coordinates file. Returns (located, unlocated): located is a list of
+    # (name, lat, lon) without repeats, in the given order.
+    table = coordinates()
+    located, unlocated, seen = [], [], set()
+    for stop in stops:
+        name, _, position = str(stop or '').partition('@')
+        name = name.strip()
+        if not name or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        point = table.get(name.lower())
+        if position.strip():
+            try:
+                lat, lon = (float(value) for value in position.split(','))
+                point = (name, lat, lon)
+            except ValueError:
+                pass
+        if point is None or not (-90 <= point[1] <= 90 and -180 <= point[2] <= 180):
+            unlocated.append(name)
+        else:
+            located.append(point)
+    return located, unlocated
+
+
+def distance_matrix(points):
+    # Great-circle distances in km between all (lat, lon) pairs. Pure Python (numpy
+    # is not a dependency), so the inner loop avoids trigonometry: sines and cosines
+    # of the half angles are computed once per point, and sin((b - a) / 2) is
+    # expanded as sin(b/2)cos(a/2) - cos(b/2)sin(a/2). Only the upper triangle is
+    # evaluated.
+    sin_lat, cos_lat, sin_lon, cos_lon = [], [], [], []
+    for lat, lon in points:
+        half_lat, half_lon = math.radians(lat) / 2, math.radians(lon) / 2
+        sin_lat.append(math.sin(half_lat))
+        cos_lat.append(math.cos(half_lat))
+        sin_lon.append(math.sin(half_lon))
+        cos_lon.append(math.cos(half_lon))
+    cos_full = [c * c - s * s for s, c in zip(sin_lat, cos_lat)]  # cos(lat)
+    asin, sqrt, diameter = math.asin, math.sqrt, 2 * EARTH_RADIUS_KM
+    n = len(points)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        sa, ca, so, co, cf, row_i = sin_lat[i], cos_lat[i], sin_lon[i], cos_lon[i], cos_full[i], matrix[i]
+        for j in range(i + 1, n):
+            dlat = sin_lat[j] * ca - cos_lat[j] * sa
+            dlon = sin_lon[j] * co - cos_lon[j] * so
+            a = dlat * dlat + cf * cos_full[j] * dlon * dlon
+            d = diameter * asin(sqrt(a) if a < 1.0 else 1.0)
+            row_i[j] = d
+            matrix[j][i] = d
+    return matrix
+
+
+def nearest_neighbour(matrix, start=0):
+    route = [start]
+    remaining = set(range(len(matrix))) - {start}
+    while remaining:
+        row = matrix[route[-1]]
+        nearest = min(remaining, key=row.__getitem__)
+        route.append(nearest)
+        remaining.remove(nearest)
+    return route
+
+
+def two_opt(route, matrix, deadline=None):
+    # Open path with a fixed first stop: reverse route[i..j] whenever that
+    # shortens it, until a full pass finds nothing or the deadline passes
+    route = list(route)
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            row_a, row_b = matrix[a], matrix[b]
+            d_ab = row_a[b]
+            for j in range(i + 1, n):
+                c = route[j]
+                if j + 1 < n:
+                    e = route[j + 1]
+                    delta = row_a[c] + row_b[e] - d_ab - matrix[c][e]
+                else:
+                    delta = row_a[c] - d_ab
+                if delta < -1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    b = route[i]
+                    row_b = matrix[b]
+                    d_ab = row_a[b]
+                    improved = True
+            if deadline is not None and time.monotonic() > deadline:
+                return route
+    return route
+
+
+def split_days(route, matrix, days, stop_cost):
+    # Cut the route into at most `days` consecutive groups minimising the
+    # heaviest day; each stop weighs stop_cost plus the leg that reaches it
+    if not route:
+        return []
+    weights = [stop_cost] + [stop_cost + matrix[route[k - 1]][route[k]] for k in range(1, len(route))]
+    days = max(1, min(days, len(route)))
+
+    def cut(limit):
+        groups, current, load = [], [], 0.0
+        for stop, weight in zip(route, weights):
+            if current and load + weight > limit:
+                groups.append(current)
+                current, load = [], 0.0
+            current.append(stop)
+            load += weight
+        groups.append(current)
+        return groups
+
+    low, high = max(weights), sum(weights)
+    for _ in range(50):
+        if high - low < 0.01:
+            break
+        middle = (low + high) / 2
+        if len(cut(middle)) <= days:
+            high = middle
+        else:
+            low = middle
+    return cut(high)
+
+
+def _route(stops, start_name):
+    # Cached by the set of stops; the order they were given in does not matter
+    key = tuple(sorted((name.lower(), lat, lon) for name, lat, lon in stops))
+    entry = matrix_cache.get(key)
+    if entry is None:
+        ordered = sorted(stops, key=lambda stop: (stop[0].lower(), stop[1], stop[2]))
+        entry = {
+            'stops': ordered,
+            'matrix': distance_matrix([(lat, lon) for _, lat, lon in ordered]),
+            'routes': {},
+        }
+        matrix_cache.set(key, entry)
+    start = [name for name, _, _ in key].index(start_name.lower())
+    route = entry['routes'].get(start)
+    if route is None:
+        deadline = time.monotonic() + _settings['optimize_seconds']
+        route = two_opt(nearest_neighbour(entry['matrix'], start), entry['matrix'], deadline)
+        entry['routes'][start] = route
+    return entry['stops'], entry['matrix'], route
+
+
+def plan_trip(stops, days, start_date=None):
+    # Returns {'days': [...], 'total_km', 'unlocated'}; every day lists its stops
+    # in visiting order. Days beyond the number of stops are left free.
+    days = max(1, int(days))
+    located, unlocated = locate(stops)
+    plan_days = []
+    total_km = 0.0
+    if located:
+        ordered, matrix, route = _route(located, located[0][0])
+        for group in split_days(route, matrix, days, _settings['stop_cost_km']):
+            km = sum(matrix[a][b] for a, b in zip(group, group[1:]))
+            if plan_days:
+                # The transfer from the previous day's last stop
+                km += matrix[plan_days[-1]['_last']][group[0]]
+            total_km += km
+            plan_days.append({
+                'stops': [{'name': ordered[i][0], 'lat': ordered[i][1], 'lon': ordered[i][2]} for i in group],
+                'km': round(km, 1),
+                '_last': group[-1],
+            })
+    while len(plan_days) < days:
+        plan_days.append({'stops': [], 'km': 0.0, '_last': None})
+    for number, day in enumerate(plan_days, 1):
+        del day['_last']
+        day['day'] = number
+        if start_date is not None:
+            day['date'] = (start_date + timedelta(days=number - 1)).isoformat()
+    return {'days': plan_days, 'total_km': round(total_km, 1), 'unlocated': unlocated}
@@ -0,0 +1,67 @@
+import hashlib
+import io
+import os
+import threading
+
+# ------------------ Website QR Codes ------------------
+#
+# QR images are built on first request rather than at import. Each image is
+# content-addressed by (url, format, size): it is kept in memory per process and
+# written once to the cache folder, so it is only regenerated when the URL changes.
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# size name -> qrcode box_size (pixels per module)
+SIZES = {
+    'small': 4,
+    'medium': 10,
+    'large': 16,
+}
+
+_memory = {}
+_lock = threading.Lock()
+
+
+def cache_key(url, fmt, size):
+    return hashlib.sha256(f"{url}\n{fmt}\n{size}".encode()).hexdigest()[:20]
+
+
+def _render(url, fmt, box_size):
+    import qrcode  # Pillow/qrcode are only imported when a QR is actually built
+
+    if fmt == 'svg':
+        from qrcode.image.svg import SvgPathImage
+        img = qrcode.make(url, box_size=box_size, image_factory=SvgPathImage)
+    else:
+        img = qrcode.make(url, box_size=box_size)
+    buf = io.BytesIO()
+    img.save(buf)
+    return buf.getvalue()
+
+
+def qr_code(url, fmt='png', size='medium', cache_dir=None):
+    # Returns (key, image bytes)
+    key = cache_key(url, fmt, size)
+    data = _memory.get(key)
+    if data is not None:
+        return key, data
+
+    path = os.path.join(cache_dir, f"{key}.{fmt}") if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        data = _render(url, fmt, SIZES[size])
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    with _lock:
+        _memory[key] = data
+    return key, data
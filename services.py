@@ -0,0 +1,928 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import hashlib
+import json
+import threading
+import time
+
+from flask import current_app, flash, g, redirect, session, url_for
+from markupsafe import Markup
+from sqlalchemy import insert, select, update, literal, union, union_all, exists, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.sql import func
+
+import analytics
+import catalog
+import migrations
+import package_io
+import planner
+from extensions import db
+from message_writer import MessageWriter
+from models import User, Package, Place, Hotel, Budget, Booking, Itinerary, Friend, Message, Conversation, Tip, package_place, package_hotel
+
+# ------------------ Utility Functions ------------------
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+# Small thread-safe LRU cache with a per-entry TTL. Values are stored and
+# returned as they are, so callers must not modify what they get back.
+class TTLCache:
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Process-wide caches, sized from the app config in init_app()
+user_cache = TTLCache()
+package_listing_cache = catalog.ListingCache()
+# Pages of the tips feed keyed by (before, limit)
+tip_cache = TTLCache(maxsize=32)
+# Admin chart data, keyed by query; see the Booking Analytics section
+analytics_cache = TTLCache(maxsize=64)
+# Rendered navbar/footer HTML keyed by (fragment, user id); see Template Fragments
+fragment_cache = TTLCache()
+# Write-behind queue for chat messages, only in CHAT_WRITE_MODE = 'batched'
+message_writer = None
+
+
+def init_app(app):
+    user_cache.maxsize = app.config['USER_CACHE_SIZE']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    package_listing_cache.ttl = app.config['CATALOG_VERSION_TTL']
+    package_listing_cache.invalidate()
+    user_cache.clear()
+    tip_cache.ttl = app.config['TIPS_CACHE_TTL']
+    tip_cache.clear()
+    analytics_cache.ttl = app.config['ANALYTICS_CACHE_TTL']
+    analytics_cache.clear()
+    fragment_cache.maxsize = app.config['FRAGMENT_CACHE_SIZE']
+    fragment_cache.ttl = app.config['FRAGMENT_CACHE_TTL']
+    fragment_cache.clear()
+
+    global message_writer
+    if message_writer is not None:
+        message_writer.stop()
+    message_writer = None
+    if app.config['CHAT_WRITE_MODE'] == 'batched':
+        message_writer = MessageWriter(
+            app, persist_messages,
+            batch_size=app.config['CHAT_BATCH_SIZE'],
+            flush_interval=app.config['CHAT_FLUSH_INTERVAL'],
+        )
+
+
+def load_user(user_id):
+    # Callers may change the dict they get, so the cached one is copied both ways
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+
+    u = db.session.get(User, user_id)
+    if not u:
+        return None
+    user = {
+        'id': u.id,
+        'name': u.name,
+        'email': u.email,
+        'phone': u.phone,
+        'profile_pic': u.profile_pic,
+        'emergency_contact': u.emergency_contact,
+        'user_id': u.id,
+    }
+    user_cache.set(user_id, dict(user))
+    return user
+
+def get_current_user():
+    # Resolved at most once per request; routes and the context processor share it
+    if 'current_user' in g:
+        return g.current_user
+
+    user_id = session.get('user_id')
+    g.current_user = load_user(user_id) if user_id else None
+    return g.current_user
+
+def invalidate_user(user_id):
+    user_cache.invalidate(user_id)
+    for name in USER_FRAGMENTS:
+        fragment_cache.invalidate((name, user_id))
+    g.pop('current_user', None)
+
+
+# ------------------ Template Fragments ------------------
+
+# Blocks shared by every page are rendered once per (name, key) and reused for
+# FRAGMENT_CACHE_TTL seconds. Fragments keyed by user id are listed here so that
+# invalidate_user() drops them when the profile changes on this worker.
+USER_FRAGMENTS = ('navbar',)
+
+def cached_fragment(name, key=None, caller=None):
+    # Template global: {% call cached_fragment('footer') %}...{% endcall %}
+    html = fragment_cache.get((name, key))
+    if html is None:
+        html = Markup(caller())
+        fragment_cache.set((name, key), html)
+    return html
+
+
+# ------------------ Auth Decorators ------------------
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'role' not in session or session['role'] != 'admin':
+            flash('Admin access required.')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# ------------------ Database Functions ------------------
+
+def create_user(email, password, role='user'):
+    existing = User.query.filter_by(email=email).first()
+    if existing:
+        return
+    u = User(email=email, password=password, role=role)
+    db.session.add(u)
+    db.session.commit()
+
+def check_user(email, password):
+    u = User.query.filter_by(email=email, password=password).first()
+    if u:
+        return u.role, u.id
+    return None, None
+
+def fetch_concepts():
+    # No concepts table; return empty list to keep UI happy
+    return []
+
+def fetch_packages(offset=0, limit=None):
+    q = db.session.query(
+        Package.title, Package.description, Package.price, Package.total_days, Package.image_path,
+    ).order_by(Package.id).offset(offset)
+    if limit is not None:
+        q = q.limit(limit)
+    return [
+        {
+            'title': p.title,
+            'description': p.description,
+            'price': p.price,
+            'total_days': p.total_days,
+            'image_path': p.image_path,
+        }
+        for p in q.all()
+    ]
+
+def fetch_package_page(page, per_page):
+    # Served from package_listing_cache until the catalog version changes. Pages
+    # past the end are clamped to the last one, so only real pages get cached.
+    version = package_listing_cache.version(db.session)
+    total = package_listing_cache.get((version, 'total'))
+    if total is None:
+        total = db.session.query(func.count(Package.id)).scalar()
+        package_listing_cache.set((version, 'total'), total)
+    pages = max(1, -(-total // per_page))
+    page = min(page, pages)
+    key = (version, 'page', page, per_page)
+    listing = package_listing_cache.get(key)
+    if listing is None:
+        listing = {
+            'packages': fetch_packages(offset=(page - 1) * per_page, limit=per_page),
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+        }
+        package_listing_cache.set(key, listing)
+    return listing
+
+def fetch_package_details(package_name):
+    p = (
+        Package.query.options(selectinload(Package.place_list), selectinload(Package.hotel_list))
+        .filter_by(title=package_name)
+        .first()
+    )
+    if not p:
+        return None
+    return {
+        'title': p.title,
+        'description': p.description,
+        'price': p.price,
+        'total_days': p.total_days,
+        'image_url': p.image_path,
+        'places': [pl.name for pl in p.place_list],
+        'hotels': [h.name for h in p.hotel_list],
+    }
+
+def search_packages(places=(), hotels=(), min_price=None, max_price=None,
+                    min_days=None, max_days=None, limit=20, offset=0):
+    # Every filter is answered from an index: place/hotel names through the link
+    # tables, price and total_days through their own indexes
+    q = db.session.query(
+        Package.id, Package.title, Package.description, Package.price,
+        Package.total_days, Package.image_path,
+    )
+    for name in catalog.clean_names(places):
+        q = q.filter(Package.id.in_(
+            select(package_place.c.package_id)
+            .join(Place, Place.id == package_place.c.place_id)
+            .where(Place.name == name)
+        ))
+    for name in catalog.clean_names(hotels):
+        q = q.filter(Package.id.in_(
+            select(package_hotel.c.package_id)
+            .join(Hotel, Hotel.id == package_hotel.c.hotel_id)
+            .where(Hotel.name == name)
+        ))
+    if min_price is not None:
+        q = q.filter(Package.price >= min_price)
+    if max_price is not None:
+        q = q.filter(Package.price <= max_price)
+    if min_days is not None:
+        q = q.filter(Package.total_days >= min_days)
+    if max_days is not None:
+        q = q.filter(Package.total_days <= max_days)
+    rows = q.order_by(Package.price, Package.id).offset(offset).limit(limit).all()
+    return [
+        {
+            'id': r.id,
+            'title': r.title,
+            'description': r.description,
+            'price': r.price,
+            'total_days': r.total_days,
+            'image_path': r.image_path,
+        }
+        for r in rows
+    ]
+
+def create_package(title, description, price, total_days, image_path, places, hotels):
+    places, hotels = catalog.clean_names(places), catalog.clean_names(hotels)
+    p = Package(
+        title=title,
+        description=description,
+        price=float(price) if price is not None else None,
+        total_days=int(total_days) if total_days else None,
+        image_path=image_path,
+        places=",".join(places),
+        hotels=",".join(hotels),
+    )
+    db.session.add(p)
+    db.session.flush()
+    catalog.replace_package_links(db.session, p.id, places, hotels)
+    db.session.commit()
+    package_listing_cache.invalidate()
+
+def update_package(package_id, title, description, price, total_days, image_url, places=[], hotels=[]):
+    p = db.session.get(Package, package_id)
+    if not p:
+        return
+    places, hotels = catalog.clean_names(places), catalog.clean_names(hotels)
+    p.title = title
+    p.description = description
+    p.price = float(price) if price is not None else None
+    p.total_days = int(total_days) if total_days else None
+    p.image_path = image_url
+    p.places = ",".join(places)
+    p.hotels = ",".join(hotels)
+    catalog.replace_package_links(db.session, p.id, places, hotels)
+    db.session.commit()
+    package_listing_cache.invalidate()
+
+def delete_package(package_id):
+    p = db.session.get(Package, package_id)
+    if p:
+        catalog.delete_package_links(db.session, p.id)
+        db.session.delete(p)
+        db.session.commit()
+        package_listing_cache.invalidate()
+
+def import_packages(stream, fmt):
+    # Bulk upsert from a CSV / JSON Lines upload, see package_io.py
+    try:
+        return package_io.import_rows(
+            db.session, package_io.read_rows(stream, fmt),
+            batch_size=current_app.config['PACKAGE_IMPORT_BATCH_SIZE'],
+        )
+    finally:
+        package_listing_cache.invalidate()
+
+def export_packages(fmt):
+    # Generator of CSV / JSON Lines lines; keep the request context alive while it runs
+    return package_io.export_rows(db.session, fmt)
+
+def fetch_user_details(email):
+    u = User.query.filter_by(email=email).first()
+    if not u:
+        return None
+    return {"email": u.email, "role": u.role}
+
+def fetch_user_details_by_id(user_id):
+    u = User.query.get(user_id)
+    if not u:
+        return None
+    return {"email": u.email, "name": u.name, "phone": u.phone, "profile_pic": u.profile_pic}
+
+def update_user_profile(user_id, name, phone, profile_pic=None, email=None, emergency_contact=None):
+    u = User.query.get(int(user_id))
+    if not u:
+        return
+    u.name = name
+    u.phone = phone
+    if profile_pic is not None:
+        u.profile_pic = profile_pic
+    if email is not None:
+        u.email = email
+    if emergency_contact is not None:
+        u.emergency_contact = emergency_contact
+    db.session.commit()
+    invalidate_user(u.id)
+
+def initialize_admin():
+    # Create tables, then bring indexes/constraints of existing databases up to date
+    db.create_all()
+    migrations.upgrade(db.engine)
+    # Seed admin
+    if not User.query.filter_by(email='admin@gmail.com').first():
+        db.session.add(User(email='admin@gmail.com', password='admin123', role='admin'))
+        db.session.commit()
+        print("Admin user created with email: admin@gmail.com and password: admin123")
+    # Seed a sample package if none exist
+    if Package.query.count() == 0:
+        create_package(
+            title='Goa Getaway',
+            description='3 nights and 4 days in Goa with beach visits and local cuisine.',
+            price=14999.0,
+            total_days=4,
+            image_path='/static/images/goa.jpg',
+            places=['Baga Beach', 'Calangute Beach', 'Fort Aguada'],
+            hotels=['Beach Resort', 'City Hotel'],
+        )
+        print('Seeded a sample package: Goa Getaway')
+
+# ------------------ User Data ------------------
+#
+# Budgets, itineraries and bookings are keyed by session['user_id'] directly:
+# no helper looks the user up by email first, and writes resolve related rows
+# (package by title, itinerary ownership) inside the INSERT itself.
+
+def fetch_budget(user_id, limit=None):
+    # With a limit, the most recent expenses first
+    q = (
+        db.session.query(Budget.name, Budget.amount, Budget.category)
+        .filter(Budget.user_id == user_id)
+    )
+    if limit is not None:
+        q = q.order_by(Budget.id.desc()).limit(limit)
+    return [{"expense_name": b.name, "amount": b.amount, "category": b.category} for b in q.all()]
+
+BUDGET_CATEGORIES = ('transport', 'stay', 'food', 'activities', 'shopping', 'other')
+
+def budget_summary(user_id):
+    # Totals, per-category and per-itinerary rollups in one statement: three
+    # GROUP BYs over the user's budget rows (ix_budget_user_id) glued with UNION ALL
+    spent = func.coalesce(func.sum(Budget.amount), 0.0)
+    totals = select(
+        literal('total').label('kind'), literal(None).label('itinerary_id'), literal(None).label('name'),
+        func.count(Budget.id).label('count'), spent.label('spent'),
+        select(User.total_budget).where(User.id == user_id).scalar_subquery().label('total_budget'),
+    ).where(Budget.user_id == user_id)
+    by_category = select(
+        literal('category'), literal(None), Budget.category,
+        func.count(Budget.id), spent, literal(None),
+    ).where(Budget.user_id == user_id).group_by(Budget.category)
+    by_itinerary = select(
+        literal('itinerary'), Budget.itinerary_id, Itinerary.destination,
+        func.count(Budget.id), spent, literal(None),
+    ).outerjoin(Itinerary, Itinerary.id == Budget.itinerary_id).where(
+        Budget.user_id == user_id
+    ).group_by(Budget.itinerary_id)
+    rows = db.session.execute(union_all(totals, by_category, by_itinerary)).all()
+
+    summary = {'total_budget': None, 'spent': 0.0, 'count': 0, 'remaining': None,
+               'by_category': [], 'by_itinerary': []}
+    for r in rows:
+        if r.kind == 'total':
+            summary.update(total_budget=r.total_budget, spent=r.spent, count=r.count)
+            if r.total_budget is not None:
+                summary['remaining'] = r.total_budget - r.spent
+        elif r.kind == 'category':
+            summary['by_category'].append({'category': r.name, 'count': r.count, 'spent': r.spent})
+        else:
+            summary['by_itinerary'].append({'itinerary_id': r.itinerary_id, 'destination': r.name,
+                                            'count': r.count, 'spent': r.spent})
+    summary['by_category'].sort(key=lambda c: -c['spent'])
+    summary['by_itinerary'].sort(key=lambda i: -i['spent'])
+    return summary
+
+def set_total_budget(user_id, amount):
+    db.session.execute(update(User).where(User.id == user_id).values(total_budget=amount))
+    db.session.commit()
+
+def fetch_previous_trips(user_id):
+    # Not implemented in SQLite baseline; return empty list for now
+    return []
+
+def fetch_itineraries(user_id):
+    rows = (
+        db.session.query(Itinerary.id, Itinerary.destination, Itinerary.start_date, Itinerary.end_date)
+        .filter(Itinerary.user_id == user_id)
+        .order_by(Itinerary.id)
+        .all()
+    )
+    return [{'id': r.id, 'destination': r.destination, 'start_date': r.start_date,
+             'end_date': r.end_date} for r in rows]
+
+def fetch_itinerary(user_id, itinerary_id):
+    r = db.session.execute(
+        select(Itinerary.id, Itinerary.destination, Itinerary.start_date, Itinerary.end_date, Itinerary.plan)
+        .where(Itinerary.id == itinerary_id, Itinerary.user_id == user_id)
+    ).first()
+    if r is None:
+        return None
+    return {'id': r.id, 'destination': r.destination, 'start_date': r.start_date,
+            'end_date': r.end_date, 'plan': json.loads(r.plan) if r.plan else None}
+
+def fetch_itineraries_between(user_id, start, end):
+    # Trips overlapping [start, end], both inclusive: a range scan of
+    # ix_itinerary_user_dates, already in start_date order
+    rows = db.session.execute(
+        select(Itinerary.id, Itinerary.destination, Itinerary.start_date, Itinerary.end_date)
+        .where(Itinerary.user_id == user_id, Itinerary.start_date <= end, Itinerary.end_date >= start)
+        .order_by(Itinerary.start_date, Itinerary.id)
+    ).all()
+    return [{'id': r.id, 'destination': r.destination, 'start_date': r.start_date,
+             'end_date': r.end_date} for r in rows]
+
+def fetch_friends_travelling(user_id, start, end):
+    # For each of the user's trips overlapping [start, end], the accepted
+    # friends' trips overlapping it; the friends' side is one index range per friend
+    mine, theirs = aliased(Itinerary), aliased(Itinerary)
+    rows = db.session.execute(
+        select(
+            mine.id.label('trip_id'), mine.destination.label('trip_destination'),
+            mine.start_date.label('trip_start'), mine.end_date.label('trip_end'),
+            theirs.id, theirs.user_id, theirs.destination, theirs.start_date, theirs.end_date,
+            User.name, User.email,
+        )
+        .select_from(mine)
+        .join(theirs, and_(
+            theirs.user_id.in_(_friend_ids(user_id)),
+            theirs.start_date <= mine.end_date,
+            theirs.end_date >= mine.start_date,
+        ))
+        .join(User, User.id == theirs.user_id)
+        .where(mine.user_id == user_id, mine.start_date <= end, mine.end_date >= start)
+        .order_by(mine.start_date, mine.id, theirs.start_date, theirs.id)
+    ).all()
+    trips = {}
+    for r in rows:
+        trip = trips.get(r.trip_id)
+        if trip is None:
+            trip = trips[r.trip_id] = {'id': r.trip_id, 'destination': r.trip_destination,
+                                       'start_date': r.trip_start, 'end_date': r.trip_end, 'friends': []}
+        trip['friends'].append({'id': r.id, 'user_id': r.user_id, 'name': _display_name(r),
+                                'destination': r.destination, 'start_date': r.start_date,
+                                'end_date': r.end_date})
+    return list(trips.values())
+
+def save_itinerary(user_id, destination, start_date, end_date, plan=None):
+    result = db.session.execute(insert(Itinerary).values(
+        user_id=user_id, destination=destination, start_date=start_date, end_date=end_date,
+        plan=json.dumps(plan) if plan is not None else None,
+    ))
+    db.session.commit()
+    return result.inserted_primary_key[0]
+
+def build_itinerary_plan(days=None, start_date=None, package_title=None, stops=()):
+    # A package contributes its places (visited first) and the plan then fits
+    # in its total_days. Returns None when the package does not exist.
+    names = []
+    if package_title:
+        package = fetch_package_details(package_title)
+        if package is None:
+            return None
+        names = package['places']
+        days = package['total_days'] or days
+    return planner.plan_trip(names + list(stops), days or 1, start_date)
+
+def create_budget(user_id, budget_name, amount, category=None, itinerary_id=None):
+    if category not in BUDGET_CATEGORIES:
+        category = 'other'
+    if itinerary_id is not None:
+        # Only link itineraries the user owns; resolved within the INSERT
+        itinerary_id = (
+            select(Itinerary.id)
+            .where(Itinerary.id == itinerary_id, Itinerary.user_id == user_id)
+            .scalar_subquery()
+        )
+    db.session.execute(insert(Budget).values(
+        user_id=user_id, name=budget_name, amount=float(amount), category=category,
+        itinerary_id=itinerary_id,
+    ))
+    db.session.commit()
+
+def save_booking(user_id, package_title):
+    # One INSERT ... SELECT finds the package by title and checks the user;
+    # returns False when either does not exist
+    result = db.session.execute(
+        insert(Booking).from_select(
+            ['user_id', 'package_id', 'price'],
+            select(literal(user_id), Package.id, Package.price)
+            .where(Package.title == package_title, exists().where(User.id == user_id)),
+        )
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+def fetch_user_bookings(user_id):
+    bookings = (
+        db.session.query(Package.title, Package.description, Package.price, Package.total_days,
+                         Package.image_path)
+        .join(Booking, Booking.package_id == Package.id)
+        .filter(Booking.user_id == user_id)
+        .all()
+    )
+    result = []
+    for p in bookings:
+        result.append({
+            'title': p.title,
+            'description': p.description,
+            'price': p.price,
+            'total_days': p.total_days,
+            'image_path': p.image_path,
+        })
+    return result
+
+def _display_name(row):
+    return row.name or row.email
+
+def _friend_ids(user_id):
+    # accepted friends both directions, as a subquery of user ids
+    return union(
+        select(Friend.friend_id).where(Friend.user_id == user_id, Friend.status == 'accepted'),
+        select(Friend.user_id).where(Friend.friend_id == user_id, Friend.status == 'accepted'),
+    )
+
+def get_friends(user_id):
+    rows = (
+        db.session.query(User.id, User.name, User.email)
+        .filter(User.id.in_(_friend_ids(user_id)))
+        .order_by(User.id)
+        .all()
+    )
+    return [{'id': r.id, 'name': _display_name(r)} for r in rows]
+
+def get_all_users(limit=None, offset=0):
+    q = db.session.query(User.id, User.name, User.email).order_by(User.id).offset(offset)
+    if limit is not None:
+        q = q.limit(limit)
+    return [{'id': r.id, 'name': _display_name(r)} for r in q.all()]
+
+def add_friend(user_id, friend_id):
+    # avoid duplicates
+    existing = Friend.query.filter_by(user_id=user_id, friend_id=friend_id).first()
+    if existing:
+        return
+    db.session.add(Friend(user_id=user_id, friend_id=friend_id, status='pending'))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # lost a race with a concurrent request for the same pair
+        db.session.rollback()
+
+def accept_friend(user_id, friend_id):
+    r = Friend.query.filter_by(user_id=friend_id, friend_id=user_id, status='pending').first()
+    if r:
+        r.status = 'accepted'
+    # ensure reciprocal row
+    reciprocal = Friend.query.filter_by(user_id=user_id, friend_id=friend_id).first()
+    if not reciprocal:
+        db.session.add(Friend(user_id=user_id, friend_id=friend_id, status='accepted'))
+    else:
+        reciprocal.status = 'accepted'
+    db.session.commit()
+
+def get_dm_messages(user_id, friend_id, before=None, since=None, limit=None):
+    # Keyset pagination on (min_user, max_user, id), matching ix_message_conversation.
+    # `before` pages backwards through history, `since` fetches newer messages.
+    # Results are always returned oldest first.
+    limit = limit or current_app.config['DM_PAGE_SIZE']
+    low, high = min(user_id, friend_id), max(user_id, friend_id)
+    q = Message.query.filter(
+        func.min(Message.sender_id, Message.receiver_id) == low,
+        func.max(Message.sender_id, Message.receiver_id) == high,
+    )
+    if since is not None:
+        msgs = q.filter(Message.id > since).order_by(Message.id.asc()).limit(limit).all()
+    else:
+        if before is not None:
+            q = q.filter(Message.id < before)
+        msgs = q.order_by(Message.id.desc()).limit(limit).all()
+        msgs.reverse()
+    return [
+        {
+            'id': m.id,
+            'message': m.message,
+            'timestamp': m.timestamp.isoformat() if m.timestamp else None,
+            'sender_id': m.sender_id,
+        }
+        for m in msgs
+    ]
+
+def persist_messages(rows):
+    # One transaction for any number of messages (a single one from save_dm_message,
+    # a batch from the MessageWriter). Returns the new ids in the order of `rows`.
+    try:
+        ids = db.session.scalars(
+            insert(Message).returning(Message.id, sort_by_parameter_order=True), rows
+        ).all()
+        _update_conversations(rows, ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return ids
+
+def _update_conversations(rows, ids):
+    # Fold the batch into one upsert per conversation: the newest message wins and
+    # the receiver's unread counter grows by the number of messages it got
+    summaries = {}
+    for row, message_id in zip(rows, ids):
+        sender, receiver = row['sender_id'], row['receiver_id']
+        low, high = min(sender, receiver), max(sender, receiver)
+        summary = summaries.setdefault((low, high), {
+            'user_low': low, 'user_high': high, 'unread_low': 0, 'unread_high': 0,
+        })
+        summary.update(last_message_id=message_id, last_sender_id=sender,
+                       last_timestamp=row['timestamp'])
+        if receiver != sender:
+            summary['unread_low' if receiver == low else 'unread_high'] += 1
+    stmt = sqlite_insert(Conversation)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Conversation.user_low, Conversation.user_high],
+        set_={
+            'last_message_id': stmt.excluded.last_message_id,
+            'last_sender_id': stmt.excluded.last_sender_id,
+            'last_timestamp': stmt.excluded.last_timestamp,
+            'unread_low': Conversation.unread_low + stmt.excluded.unread_low,
+            'unread_high': Conversation.unread_high + stmt.excluded.unread_high,
+        },
+    )
+    db.session.execute(stmt, list(summaries.values()))
+
+def save_dm_message(sender_id, receiver_id, message):
+    # Returns the message as get_dm_messages lists it. 'id' is None when the write
+    # is deferred to the batched MessageWriter (CHAT_WRITE_MODE = 'batched'); the
+    # (sender_id, timestamp) pair is what the stored row will have either way.
+    row = {
+        'sender_id': sender_id,
+        'receiver_id': receiver_id,
+        'message': message,
+        'timestamp': datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+    if message_writer is not None:
+        message_writer.submit(dict(row))
+        message_id = None
+    else:
+        message_id = persist_messages([row])[0]
+    return {'id': message_id, 'message': message, 'timestamp': row['timestamp'].isoformat(),
+            'sender_id': sender_id}
+
+def mark_conversation_read(user_id, friend_id):
+    # Reset my unread counter; returns the id of the last message read, or None.
+    # In batched mode a message still queued in the MessageWriter is counted
+    # once it lands, even if the reader already saw it live.
+    low, high = min(user_id, friend_id), max(user_id, friend_id)
+    counter = 'unread_low' if user_id == low else 'unread_high'
+    last_id = db.session.execute(
+        update(Conversation)
+        .where(Conversation.user_low == low, Conversation.user_high == high)
+        .values({counter: 0})
+        .returning(Conversation.last_message_id)
+    ).scalar()
+    db.session.commit()
+    return last_id
+
+def get_conversations(user_id, limit=None):
+    # Inbox, most recent conversation first. Each half of the union walks its own
+    # (user, last_message_id) index, so the cost grows with the number of
+    # conversations, never with the number of messages.
+    as_low = select(
+        Conversation.user_high.label('friend_id'), Conversation.last_message_id,
+        Conversation.last_sender_id, Conversation.last_timestamp,
+        Conversation.unread_low.label('unread'),
+    ).where(Conversation.user_low == user_id)
+    as_high = select(
+        Conversation.user_low.label('friend_id'), Conversation.last_message_id,
+        Conversation.last_sender_id, Conversation.last_timestamp,
+        Conversation.unread_high.label('unread'),
+    ).where(Conversation.user_high == user_id)
+    inbox = union_all(as_low, as_high).subquery()
+    q = (
+        select(inbox, User.name, User.email, Message.message)
+        .join(User, User.id == inbox.c.friend_id)
+        .join(Message, Message.id == inbox.c.last_message_id)
+        .order_by(inbox.c.last_message_id.desc())
+    )
+    if limit is not None:
+        q = q.limit(limit)
+    return [
+        {
+            'friend_id': r.friend_id,
+            'name': _display_name(r),
+            'last_message_id': r.last_message_id,
+            'last_message': r.message,
+            'last_sender_id': r.last_sender_id,
+            'last_timestamp': r.last_timestamp.isoformat() if r.last_timestamp else None,
+            'unread': r.unread,
+        }
+        for r in db.session.execute(q)
+    ]
+
+def get_suggested_friends(user_id, limit=None, offset=0):
+    # Friends-of-friends ranked by mutual friend count, then everyone else not yet
+    # connected. Users with any Friend row (pending or accepted) towards me are skipped.
+    limit = limit or current_app.config['SUGGESTIONS_PAGE_SIZE']
+    friends = _friend_ids(user_id)
+
+    def connected(other):
+        # Any row between me and `other`, through uq_friend_user_friend
+        return exists().where(or_(
+            and_(Friend.user_id == user_id, Friend.friend_id == other),
+            and_(Friend.user_id == other, Friend.friend_id == user_id),
+        ))
+
+    # Accepted edges leaving my friends only, as distinct (friend, candidate) pairs,
+    # counted per candidate
+    edges = union(
+        select(Friend.user_id.label('f'), Friend.friend_id.label('c'))
+        .where(Friend.user_id.in_(friends), Friend.status == 'accepted'),
+        select(Friend.friend_id.label('f'), Friend.user_id.label('c'))
+        .where(Friend.friend_id.in_(friends), Friend.status == 'accepted'),
+    ).subquery()
+    ranked = select(edges.c.c, func.count().label('mutual')).group_by(edges.c.c).subquery()
+    fof = (
+        db.session.query(User.id, User.name, User.email, ranked.c.mutual)
+        .join(ranked, ranked.c.c == User.id)
+        .filter(User.id != user_id, ~connected(User.id))
+    )
+    rows = fof.order_by(ranked.c.mutual.desc(), User.id).offset(offset).limit(limit).all()
+    suggestions = [{'id': r.id, 'name': _display_name(r), 'mutual': r.mutual} for r in rows]
+    if len(rows) == limit:
+        return suggestions
+
+    # Pad a short page with unconnected users that share no friends with me
+    if rows or not offset:
+        fof_total = offset + len(rows)
+    else:
+        fof_total = fof.order_by(None).count()
+    shares_a_friend = exists().where(Friend.status == 'accepted', or_(
+        and_(Friend.user_id == User.id, Friend.friend_id.in_(friends)),
+        and_(Friend.friend_id == User.id, Friend.user_id.in_(friends)),
+    ))
+    others = (
+        db.session.query(User.id, User.name, User.email)
+        .filter(User.id != user_id, ~connected(User.id), ~shares_a_friend)
+        .order_by(User.id.desc())
+        .offset(max(0, offset - fof_total))
+        .limit(limit - len(rows))
+        .all()
+    )
+    suggestions.extend({'id': r.id, 'name': _display_name(r), 'mutual': 0} for r in others)
+    return suggestions
+
+def get_friend_requests(user_id):
+    rows = (
+        db.session.query(User.id, User.name, User.email)
+        .join(Friend, Friend.user_id == User.id)
+        .filter(Friend.friend_id == user_id, Friend.status == 'pending')
+        .order_by(Friend.id)
+        .all()
+    )
+    return [{'id': r.id, 'name': _display_name(r)} for r in rows]
+
+# ------------------ Tips ------------------
+
+def tip_hash(content):
+    # Case and whitespace differences do not make a tip new
+    normalized = ' '.join(content.split()).lower()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+def create_tip(user_id, content):
+    # Returns False when the same tip was already shared
+    content = content.strip()
+    db.session.add(Tip(user_id=user_id, content=content, content_hash=tip_hash(content)))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    tip_cache.clear()
+    return True
+
+def fetch_tips(before=None, limit=None):
+    # Newest first, keyset paginated on id. Returns the page and the cursor for
+    # the next (older) page, or None on the last one.
+    limit = limit or current_app.config['TIPS_PAGE_SIZE']
+    key = (before, limit)
+    cached = tip_cache.get(key)
+    if cached is not None:
+        return cached
+
+    q = (
+        db.session.query(Tip.id, Tip.content, Tip.created_at, User.name, User.email)
+        .join(User, User.id == Tip.user_id)
+        .order_by(Tip.id.desc())
+    )
+    if before is not None:
+        q = q.filter(Tip.id < before)
+    rows = q.limit(limit + 1).all()
+    tips = [
+        {
+            'id': r.id,
+            'content': r.content,
+            'author': _display_name(r),
+            'created_at': r.created_at,
+        }
+        for r in rows[:limit]
+    ]
+    next_before = tips[-1]['id'] if len(rows) > limit else None
+    tip_cache.set(key, (tips, next_before))
+    return tips, next_before
+
+# ------------------ Booking Analytics ------------------
+#
+# Chart data comes from the booking_daily rollup (analytics.py), never from
+# booking itself, and each answer is cached per worker for ANALYTICS_CACHE_TTL
+# seconds so dashboard refreshes do not add database load.
+
+def booking_daily_stats(start, end, package_id=None):
+    # One entry per day in [start, end], zeros included
+    key = ('daily', start, end, package_id)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    totals = {row[0]: row[1:] for row in analytics.daily_totals(db.session, start, end, package_id)}
+    days = []
+    day = start
+    while day <= end:
+        bookings, revenue = totals.get(day.isoformat(), (0, 0.0))
+        days.append({'day': day.isoformat(), 'bookings': bookings, 'revenue': revenue})
+        day += timedelta(days=1)
+    analytics_cache.set(key, days)
+    return days
+
+def booking_package_stats(start, end, limit=20):
+    key = ('packages', start, end, limit)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    packages = analytics.package_totals(db.session, start, end, limit)
+    analytics_cache.set(key, packages)
+    return packages
+
+def rebuild_booking_stats():
+    result = analytics.rebuild_booking_daily(
+        db.engine,
+        batch_size=current_app.config['BOOKING_STATS_BATCH_SIZE'],
+        pause=current_app.config['BOOKING_STATS_REBUILD_PAUSE'],
+    )
+    analytics_cache.clear()
+    return result
@@ -0,0 +1,149 @@
+import json
+import queue
+import socket
+import socketserver
+import threading
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+# ------------------ Socket.IO Message Queue ------------------
+#
+# With several workers, each one only knows the clients connected to itself, so
+# an emit to `user_{id}` or `dm_{a}_{b}` has to be fanned out to every worker.
+# Flask-SocketIO does that through a message queue (redis://, amqp://, ...).
+# For a single box without extra services, `local://host:port` selects
+# LocalBrokerManager, which relays messages through run_broker(), a tiny
+# newline-delimited JSON pub/sub server (flask --app app socketio-broker).
+#
+# Handshake: a client sends "PUB <channel>\n" or "SUB <channel>\n"; every line a
+# publisher sends afterwards is copied to all subscribers of that channel.
+
+DEFAULT_ADDRESS = ('127.0.0.1', 5680)
+
+
+def parse_address(url):
+    parsed = urlparse(url)
+    return parsed.hostname or DEFAULT_ADDRESS[0], parsed.port or DEFAULT_ADDRESS[1]
+
+
+class LocalBrokerManager(PubSubManager):
+    name = 'local-broker'
+
+    def __init__(self, url='local://', channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = parse_address(url)
+        self._socket = socket
+        self._outbox = None
+
+    def initialize(self):
+        if self.server.async_mode == 'eventlet':
+            from eventlet.green import socket as green_socket
+            self._socket = green_socket
+        super().initialize()
+        self._outbox = self.server.eio.create_queue()
+        self.server.start_background_task(self._sender)
+
+    def _connect(self, role):
+        sock = self._socket.create_connection(self.address)
+        sock.sendall(f"{role} {self.channel}\n".encode())
+        return sock
+
+    def _publish(self, data):
+        # Hand the message to a background sender so emits never wait on the broker
+        if self._outbox is None:
+            # write-only use from a script, outside of a Socket.IO server
+            self._outbox = queue.Queue()
+            threading.Thread(target=self._sender, daemon=True).start()
+        self._outbox.put((json.dumps(data) + '\n').encode())
+
+    def _sender(self):
+        sock = None
+        while True:
+            line = self._outbox.get()
+            for attempt in range(2):
+                try:
+                    if sock is None:
+                        sock = self._connect('PUB')
+                    sock.sendall(line)
+                    break
+                except OSError:
+                    if sock is not None:
+                        sock.close()
+                    sock = None
+                    if attempt:
+                        self._get_logger().error('Cannot publish to the local broker at %s:%s',
+                                                 *self.address)
+
+    def _listen(self):
+        retry_sleep = 1
+        while True:
+            try:
+                with self._connect('SUB') as sock:
+                    retry_sleep = 1
+                    for line in sock.makefile('rb'):
+                        yield json.loads(line)
+            except OSError:
+                self._get_logger().error('Cannot receive from the local broker, retrying in %s secs',
+                                         retry_sleep)
+            self.server.sleep(retry_sleep)
+            retry_sleep = min(retry_sleep * 2, 60)
+
+
+# ------------------ Local Broker ------------------
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        role, _, channel = self.rfile.readline().decode().strip().partition(' ')
+        if role == 'SUB':
+            self.server.subscribe(channel, self.wfile)
+            try:
+                # Block until the subscriber goes away
+                while self.rfile.readline():
+                    pass
+            finally:
+                self.server.unsubscribe(channel, self.wfile)
+        elif role == 'PUB':
+            for line in self.rfile:
+                self.server.publish(channel, line)
+
+
+class LocalBroker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        super().__init__(address, _BrokerHandler)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, wfile):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(wfile)
+
+    def unsubscribe(self, channel, wfile):
+        with self._lock:
+            self._subscribers.get(channel, set()).discard(wfile)
+
+    def publish(self, channel, line):
+        # Held while writing so lines from concurrent publishers never interleave
+        with self._lock:
+            for wfile in list(self._subscribers.get(channel, ())):
+                try:
+                    wfile.write(line)
+                    wfile.flush()
+                except OSError:
+                    self._subscribers[channel].discard(wfile)
+
+
+def run_broker(host=DEFAULT_ADDRESS[0], port=DEFAULT_ADDRESS[1]):
+    with LocalBroker((host, port)) as broker:
+        broker.serve_forever()
+
+
+def start_broker_thread(host=DEFAULT_ADDRESS[0], port=DEFAULT_ADDRESS[1]):
+    # For tests and single-process demos; returns the running broker
+    broker = LocalBroker((host, port))
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    return broker
@@ -0,0 +1,23 @@
+from sqlalchemy import event
+
+# ------------------ SQLite Connection Tuning ------------------
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def install_pragmas(engine, pragmas):
+    # Run the PRAGMAs on every new pooled connection (they are per-connection
+    # settings, except journal_mode which is persisted in the database file)
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)